@@ -1,17 +1,24 @@
-import streamlit as st
 import base64
+import os
+
+import streamlit as st
 
 # Page config
 st.set_page_config(page_title="Food Distribution Optimizer", layout="wide")
 
 # 🔧 Optional: Background image
-def set_background(image_path):
+@st.cache_data(show_spinner=False)
+def image_data_url(image_path, mtime):
+    # Encoded once per process (and again only when the image changes), not on every rerun
     with open(image_path, "rb") as file:
-        encoded = base64.b64encode(file.read()).decode()
-    page_bg = f"""
+        return "data:image/jpeg;base64," + base64.b64encode(file.read()).decode()
+
+
+def background_css(url):
+    return f"""
     <style>
     .stApp {{
-        background-image: url("data:image/png;base64,{encoded}");
+        background-image: url("{url}");
         background-size: cover;
         background-position: center;
         background-attachment: fixed;
@@ -46,7 +53,18 @@ def set_background(image_path):
     }}
     </style>
     """
-    st.markdown(page_bg, unsafe_allow_html=True)
+
+
+def set_background(image_path):
+    # With server.enableStaticServing and the image in ./static the browser fetches (and caches)
+    # it once; otherwise it is inlined from the per-process cache
+    name = os.path.basename(image_path)
+    static_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", name)
+    if st.get_option("server.enableStaticServing") and os.path.exists(static_path):
+        url = f"app/static/{name}"
+    else:
+        url = image_data_url(image_path, os.path.getmtime(image_path))
+    st.markdown(background_css(url), unsafe_allow_html=True)
 
 set_background("your_background.jpg") 
 
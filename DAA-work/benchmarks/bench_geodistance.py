@@ -0,0 +1,43 @@
+# Per-call geopy geodesic vs the vectorized kernels in geodistance.py (one-to-many)
+# Run from DAA-work:  python benchmarks/bench_geodistance.py [sizes...]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from geopy.distance import geodesic
+
+from geodistance import one_to_many
+
+CENTER = (12.8405, 80.1535)  # VIT Chennai
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    rng = np.random.default_rng(42)
+
+    print(f"{'points':>8} {'geodesic':>10} {'haversine':>10} {'vincenty':>10} {'speedup':>9} {'hav err km':>11} {'vin err km':>11}")
+    for n in sizes:
+        points = np.column_stack([
+            CENTER[0] + rng.uniform(-0.5, 0.5, n),
+            CENTER[1] + rng.uniform(-0.5, 0.5, n),
+        ])
+
+        t_geo, ref = timed(lambda: np.array([geodesic(CENTER, tuple(p)).km for p in points]))
+        t_hav, hav = timed(lambda: one_to_many(CENTER, points))
+        t_vin, vin = timed(lambda: one_to_many(CENTER, points, ellipsoid=True))
+
+        print(f"{n:>8} {t_geo:>9.3f}s {t_hav:>9.4f}s {t_vin:>9.4f}s {t_geo / t_hav:>8.0f}x "
+              f"{np.abs(hav - ref).max():>11.4f} {np.abs(vin - ref).max():>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# End-to-end planning benchmark on synthetic cities: time and peak memory of every pipeline
+# stage plus route quality, written as JSON so runs can be compared across commits.
+# Fully offline (straight-line distances, no routing or geocoding services).
+# Run from DAA-work:  python benchmarks/bench_pipeline.py --sizes 100 1000 10000 --out bench.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import memo
+import planning
+from distance_matrix import build_distance_matrix
+from synthetic import CENTER, generate
+
+
+def measure(stage, results, func, *args, trace_memory=True, **kwargs):
+    """
+    Run func cold (pipeline caches cleared) and record its seconds, then run it once more
+    under tracemalloc for the peak memory (tracing slows Python code down too much to time it).
+    """
+    memo.invalidate()
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    results[stage] = {"seconds": round(time.perf_counter() - start, 4)}
+
+    if trace_memory:
+        memo.invalidate()
+        tracemalloc.start()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[stage]["peak_mb"] = round(peak / 1024 ** 2, 2)
+
+    m = results[stage]
+    print(f"{results.get('_entities', ''):>9} {stage:<44} {m['seconds']:>8.3f} {m.get('peak_mb', float('nan')):>8.1f}",
+          flush=True)
+    return value
+
+
+def route_quality(route_km):
+    km = np.asarray(list(route_km.values()), dtype=float)
+    if not len(km):
+        return {"routes": 0, "total_km": 0.0, "max_km": 0.0, "imbalance": None}
+    return {
+        "routes": int(len(km)),
+        "total_km": round(float(km.sum()), 3),
+        "max_km": round(float(km.max()), 3),
+        # Longest route over the average one; 1.0 means perfectly even work
+        "imbalance": round(float(km.max() / km.mean()), 3) if km.mean() > 0 else None,
+    }
+
+
+def run_size(n_entities, args):
+    trace = {"trace_memory": not args.no_memory}
+    volunteers, ngos, destinations = generate(n_entities, args.center, args.radius_km, args.seed)
+    result = {
+        "entities": n_entities,
+        "volunteers": len(volunteers),
+        "ngos": len(ngos),
+        "destinations": len(destinations),
+        "stages": {},
+        "skipped": {},
+    }
+    stages = result["stages"]
+    stages["_entities"] = n_entities  # only for the progress lines, removed below
+
+    ngos, destinations, flows = measure("normalize_food_supply", stages, planning.normalize_food_supply, ngos,
+                                        destinations, args.allocation, **trace)
+    volunteers, ngos, destinations = measure("assign_locations", stages, planning.assign_locations,
+                                             volunteers, ngos, destinations, args.method, flows, **trace)
+
+    # The dense matrix grows with the square of the entity count
+    n_points = len(volunteers) + len(ngos) + len(destinations)
+    matrix_mb = n_points ** 2 * 8 / 1024 ** 2
+    if matrix_mb <= args.max_matrix_mb:
+        matrix = measure("distance_matrix", stages, build_distance_matrix, ngos, destinations, volunteers, **trace)
+        routes, route_km = measure("build_volunteer_routes", stages, planning.build_volunteer_routes,
+                                   volunteers, ngos, destinations, _matrix=matrix, solver=args.solver,
+                                   time_budget=None, max_moves=args.max_moves, workers=args.workers, **trace)
+    else:
+        matrix = None
+        result["skipped"]["distance_matrix"] = f"dense matrix would need {matrix_mb:.0f} MB"
+        routes, route_km = measure("build_volunteer_routes (greedy, no matrix)", stages,
+                                   planning.build_volunteer_routes, volunteers, ngos, destinations, **trace)
+    result["quality"] = route_quality(route_km)
+
+    # The older graph-based path in utils compares every volunteer against every destination
+    if matrix is not None and n_entities <= args.utils_max:
+        from utils import assign_routes, build_weighted_graph
+
+        measure("utils.build_weighted_graph", stages, build_weighted_graph, ngos, "NGO", matrix, **trace)
+        measure("utils.assign_routes", stages, assign_routes, ngos, destinations, volunteers, matrix, **trace)
+    else:
+        result["skipped"]["utils"] = f"only run up to {args.utils_max} entities with a dense matrix"
+
+    del stages["_entities"]
+    result["total_seconds"] = round(sum(s["seconds"] for s in stages.values()), 4)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the planning pipeline on synthetic cities")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--center", type=lambda s: tuple(float(x) for x in s.split(",")), default=CENTER,
+                        help="lat,lon of the city center")
+    parser.add_argument("--radius-km", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--allocation", choices=planning.ALLOCATIONS, default="flow")
+    parser.add_argument("--method", default="auto", help="clustering method")
+    parser.add_argument("--solver", default="local-search")
+    parser.add_argument("--max-moves", type=int, default=200, help="improving moves per route (deterministic)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-matrix-mb", type=float, default=2048)
+    parser.add_argument("--utils-max", type=int, default=1000,
+                        help="largest size for the utils graph stages (dense graphs, one edge per pair)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass of every stage")
+    parser.add_argument("--out", default="bench_pipeline.json")
+    args = parser.parse_args()
+
+    # Import everything the stages load lazily, so no stage pays for a module import
+    import clustering, fleet, parallel_routes, utils  # noqa: F401
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "settings": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": [],
+    }
+
+    print(f"{'entities':>9} {'stage':<44} {'seconds':>8} {'peak MB':>8}")
+    for n in args.sizes:
+        result = run_size(n, args)
+        report["results"].append(result)
+        q = result["quality"]
+        print(f"{n:>9} {'routes / total km / imbalance':<44} {q['routes']} / {q['total_km']:.1f} / {q['imbalance']}")
+        for stage, reason in result["skipped"].items():
+            print(f"{n:>9} skipped {stage}: {reason}")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
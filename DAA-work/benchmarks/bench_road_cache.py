@@ -0,0 +1,47 @@
+# Cold vs warm timings for build_weighted_graph with the road-network cache
+# Run from DAA-work:  python benchmarks/bench_road_cache.py [ngos.xlsx]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import road_network
+from utils import build_weighted_graph
+
+
+def timed_build(df):
+    start = time.perf_counter()
+    build_weighted_graph(df, node_type="NGO")
+    return time.perf_counter() - start
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "ngos.xlsx"
+    df = pd.read_excel(path)
+
+    cache_dir = tempfile.mkdtemp(prefix="osm_cache_")
+    road_network.CACHE_DIR = cache_dir
+    try:
+        road_network.clear_memory_cache()
+        cold = timed_build(df)
+
+        road_network.clear_memory_cache()
+        warm_disk = timed_build(df)
+
+        warm_memory = timed_build(df)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"nodes={len(df)}")
+    print(f"cold (download)     {cold:8.2f}s")
+    print(f"warm (disk cache)   {warm_disk:8.2f}s")
+    print(f"warm (memory cache) {warm_memory:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
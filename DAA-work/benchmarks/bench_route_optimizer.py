@@ -0,0 +1,57 @@
+# Greedy nearest-neighbour routes vs 2-opt/Or-opt local search on random single-volunteer instances
+# Run from DAA-work:  python benchmarks/bench_route_optimizer.py [time_budget_seconds]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from geodistance import many_to_many
+from route_optimizer import get_solver, route_cost
+
+CENTER = (12.8405, 80.1535)  # VIT Chennai
+
+
+def instance(n_stops, rng):
+    points = np.column_stack([
+        CENTER[0] + rng.uniform(-0.15, 0.15, n_stops + 1),
+        CENTER[1] + rng.uniform(-0.15, 0.15, n_stops + 1),
+    ])
+    n_pickups = n_stops // 3
+    pickups = list(range(1, n_pickups + 1))
+    drops = list(range(n_pickups + 1, n_stops + 1))
+    pickup_loads = rng.integers(50, 200, len(pickups))
+    drop_loads = rng.integers(10, 100, len(drops))
+    return many_to_many(points), pickups, drops, pickup_loads, drop_loads
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    rng = np.random.default_rng(7)
+    greedy, local = get_solver("greedy"), get_solver("local-search")
+
+    print(f"{'stops':>6} {'greedy km':>10} {'local km':>10} {'gain':>7} {'strict gain':>12} {'seconds':>8}")
+    for n_stops in (50, 100, 200):
+        gains, strict_gains, seconds, g_km, l_km = [], [], [], [], []
+        for _ in range(5):
+            km, pickups, drops, pl, dl = instance(n_stops, rng)
+            base = route_cost(km, greedy(km, 0, pickups, drops))
+
+            start = time.perf_counter()
+            improved = route_cost(km, local(km, 0, pickups, drops, pl, dl, time_budget=budget))
+            seconds.append(time.perf_counter() - start)
+            strict = route_cost(km, local(km, 0, pickups, drops, time_budget=budget))
+
+            g_km.append(base)
+            l_km.append(improved)
+            gains.append(1 - improved / base)
+            strict_gains.append(1 - strict / base)
+
+        print(f"{n_stops:>6} {np.mean(g_km):>10.1f} {np.mean(l_km):>10.1f} {np.mean(gains):>6.1%} "
+              f"{np.mean(strict_gains):>11.1%} {np.mean(seconds):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Serial per-point snapping vs SnapService against the local ORS stub
+# Run from DAA-work:  python benchmarks/bench_snapping.py [points] [latency_seconds]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import requests
+
+from ors_stub import start_stub
+from snapping import SnapService
+
+CENTER = (12.8405, 80.1535)  # VIT Chennai
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    server, url = start_stub(latency=latency)
+
+    rng = np.random.default_rng(0)
+    unique = [(CENTER[0] + a, CENTER[1] + b) for a, b in rng.uniform(-0.1, 0.1, (n // 4, 2))]
+    # Routes revisit the same NGOs and destinations, so repeat each point a few times
+    points = [unique[i] for i in rng.integers(0, len(unique), n)]
+
+    start = time.perf_counter()
+    for lat, lon in points:
+        requests.post(url + "/v2/nearest", json={"coordinates": [[lon, lat]], "radius": 350})
+    serial = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = SnapService("stub-key", base_url=url, cache_path=os.path.join(tmp, "snaps.sqlite"))
+        start = time.perf_counter()
+        service.snap_many(points)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        service.snap_many(points)
+        warm = time.perf_counter() - start
+
+        reloaded = SnapService("stub-key", base_url=url, cache_path=os.path.join(tmp, "snaps.sqlite"))
+        start = time.perf_counter()
+        reloaded.snap_many(points)
+        disk = time.perf_counter() - start
+
+    server.shutdown()
+    print(f"points={n} unique={len(set(points))} latency={latency}s")
+    print(f"serial requests      {serial:8.3f}s")
+    print(f"service cold         {cold:8.3f}s  requests={service.stats['requests']}")
+    print(f"service warm memory  {warm:8.4f}s")
+    print(f"service warm disk    {disk:8.4f}s  requests={reloaded.stats['requests']}")
+
+
+if __name__ == "__main__":
+    main()
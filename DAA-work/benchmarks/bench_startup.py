@@ -0,0 +1,86 @@
+# Cold import time of what each Streamlit page loads, each in a fresh interpreter, against a
+# startup budget. Also fails when a heavy library gets loaded where nothing needs it yet.
+# Run from DAA-work:  python benchmarks/bench_startup.py [--repeat 5] [--slack 1.5] [--out startup.json]
+# Exits with status 1 when any budget is exceeded, so it can guard the startup time in CI.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("sklearn", "scipy", "networkx", "osmnx", "geopy", "openrouteservice", "folium", "streamlit")
+
+# name -> (modules the page imports, budget in seconds, heavy modules that must stay unloaded)
+TARGETS = {
+    "registration (utils, geocoding)": (
+        ["utils", "geocoding"], 1.0,
+        ("sklearn", "scipy", "networkx", "osmnx", "geopy", "streamlit", "folium")),
+    "entity maps (rendering, snapshot, utils)": (
+        ["rendering", "snapshot", "storage", "utils"], 1.5,
+        ("sklearn", "scipy", "networkx", "osmnx", "geopy")),
+    "bulk import": (
+        ["bulk_import", "geocoding"], 1.0,
+        ("sklearn", "scipy", "networkx", "osmnx", "geopy", "folium")),
+    "route page": (
+        ["clustering", "route_optimizer", "incremental", "memo", "instrumentation", "planning", "rendering",
+         "routing_backends", "route_cache", "snapping", "geodistance"], 1.5,
+        ("sklearn", "scipy", "networkx", "osmnx", "openrouteservice")),
+    "plan CLI": (
+        ["planning"], 1.0,
+        ("sklearn", "scipy", "networkx", "osmnx", "folium", "streamlit")),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(modules):
+    # One fresh interpreter, so nothing is already imported
+    out = subprocess.run([sys.executable, "-c", PROBE.format(modules=modules, heavy=HEAVY)], cwd=APP_DIR,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guard the import time of the app's pages")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per target (median is used)")
+    parser.add_argument("--slack", type=float, default=1.0, help="multiply every budget, e.g. on slow machines")
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    print(f"{'target':<42} {'median s':>9} {'budget s':>9}  status")
+    for name, (modules, budget, forbidden) in TARGETS.items():
+        runs = [probe(modules) for _ in range(args.repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        loaded = sorted(set(runs[-1]["loaded"]) & set(forbidden))
+        budget *= args.slack
+
+        problems = []
+        if seconds > budget:
+            problems.append("over budget")
+        if loaded:
+            problems.append(f"loads {', '.join(loaded)}")
+        failed |= bool(problems)
+        results[name] = {"seconds": round(seconds, 4), "budget": budget, "heavy_loaded": runs[-1]["loaded"],
+                         "ok": not problems}
+        print(f"{name:<42} {seconds:>9.3f} {budget:>9.2f}  {'; '.join(problems) or 'ok'}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# Local stand-in for the ORS /v2/nearest endpoint, for exercising snapping.SnapService offline
+# Run from DAA-work:  python benchmarks/ors_stub.py [port] [latency_seconds]
+# then point the app at it with ORS_BASE_URL=http://127.0.0.1:<port>
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OFFSET = 0.0001  # snapped points are moved by this many degrees so tests can tell them apart
+
+
+def make_handler(latency=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        requests_seen = 0
+
+        def do_POST(self):
+            Handler.requests_seen += 1
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path != "/v2/nearest" or "coordinates" not in body:
+                self.send_error(404)
+                return
+
+            time.sleep(latency)
+            lon, lat = body["coordinates"][0]
+            payload = json.dumps({"features": [{"geometry": {"coordinates": [lon + OFFSET, lat + OFFSET]}}]})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload.encode())
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(port=0, latency=0.0):
+    # Serve in a background thread; returns (server, base_url). Stop with server.shutdown()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    server, url = start_stub(port, latency)
+    print(f"ORS stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
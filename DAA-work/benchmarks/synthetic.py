@@ -0,0 +1,93 @@
+# Seeded synthetic NGOs, destinations and volunteers around a city center, with the same
+# columns the entity database returns. Used by bench_pipeline.py; also handy for manual tests:
+#   python benchmarks/synthetic.py 5000 --out-dir /tmp/city   (writes ngos/destinations/volunteers.csv)
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from fleet import VEHICLE_CAPACITY
+
+CENTER = (12.8405, 80.1535)  # VIT Chennai
+KM_PER_DEGREE = 111.32
+
+
+def _points(n, center, radius_km, hotspots, rng):
+    # Most points cluster around a few neighbourhoods, the rest are spread over the whole city
+    lat0, lon0 = center
+    deg = radius_km / KM_PER_DEGREE
+    lon_scale = 1 / np.cos(np.radians(lat0))
+    centers = np.column_stack([rng.uniform(-deg, deg, hotspots), rng.uniform(-deg, deg, hotspots) * lon_scale])
+
+    clustered = rng.random(n) < 0.7
+    which = rng.integers(0, hotspots, n)
+    spread = deg / 6
+    offsets = np.where(
+        clustered[:, None],
+        centers[which] + rng.normal(0, spread, (n, 2)) * [1, lon_scale],
+        np.column_stack([rng.uniform(-deg, deg, n), rng.uniform(-deg, deg, n) * lon_scale]),
+    )
+    return lat0 + offsets[:, 0], lon0 + offsets[:, 1]
+
+
+def generate(n_entities, center=CENTER, radius_km=15.0, seed=0, hotspots=8):
+    """
+    (volunteers, ngos, destinations) with n_entities rows in total:
+    2% volunteers (at least 2), 25% NGOs, the rest destinations.
+    """
+    rng = np.random.default_rng(seed)
+    n_vol = max(2, n_entities // 50)
+    n_ngo = max(1, n_entities // 4)
+    n_dest = max(1, n_entities - n_vol - n_ngo)
+
+    lat, lon = _points(n_ngo, center, radius_km, hotspots, rng)
+    ngos = pd.DataFrame({
+        "ID": [f"N{i}" for i in range(n_ngo)],
+        "Name": [f"NGO {i}" for i in range(n_ngo)],
+        "Latitude": lat,
+        "Longitude": lon,
+        "Food_Availability": rng.integers(10, 200, n_ngo).astype(float),
+    })
+
+    lat, lon = _points(n_dest, center, radius_km, hotspots, rng)
+    destinations = pd.DataFrame({
+        "ID": [f"D{i}" for i in range(n_dest)],
+        "Name": [f"Shelter {i}" for i in range(n_dest)],
+        "Latitude": lat,
+        "Longitude": lon,
+        "People in Need": rng.integers(5, 120, n_dest).astype(float),
+    })
+
+    lat, lon = _points(n_vol, center, radius_km, hotspots, rng)
+    volunteers = pd.DataFrame({
+        "ID": [f"V{i}" for i in range(n_vol)],
+        "Name": [f"Volunteer {i}" for i in range(n_vol)],
+        "Phone": None,
+        "Address": None,
+        "Latitude": lat,
+        "Longitude": lon,
+        "Vehicle Type": rng.choice(list(VEHICLE_CAPACITY), n_vol),
+        "Status": "available",
+    })
+    return volunteers, ngos, destinations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic city dataset as CSV files")
+    parser.add_argument("entities", type=int)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--center", default=f"{CENTER[0]},{CENTER[1]}", help="lat,lon")
+    parser.add_argument("--radius-km", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    center = tuple(float(x) for x in args.center.split(","))
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, frame in zip(("volunteers", "ngos", "destinations"),
+                           generate(args.entities, center, args.radius_km, args.seed)):
+        frame.to_csv(os.path.join(args.out_dir, f"{name}.csv"), index=False)
+        print(f"{name}: {len(frame)} rows")
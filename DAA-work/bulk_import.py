@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import SCHEMAS, get_repository
+
+
+# Bulk ingestion of NGOs, destinations and volunteers from CSV, Parquet or GeoJSON.
+# Rows are streamed in chunks, validated with vectorized checks, deduplicated on ID
+# (within the upload and against the database) and each chunk is committed in one transaction.
+
+FORMATS = ("csv", "parquet", "geojson")
+
+# Alternative spellings accepted in uploaded files -> DataFrame column names used by storage
+ALIASES = {
+    "id": "ID", "aadhar_id": "ID",
+    "name": "Name",
+    "lat": "Latitude", "latitude": "Latitude",
+    "lon": "Longitude", "lng": "Longitude", "long": "Longitude", "longitude": "Longitude",
+    "food_availability": "Food_Availability", "food": "Food_Availability",
+    "people_in_need": "People in Need", "people in need": "People in Need", "need": "People in Need",
+    "phone": "Phone",
+    "address": "Address",
+    "vehicle_type": "Vehicle Type", "vehicle type": "Vehicle Type", "vehicle": "Vehicle Type",
+    "status": "Status",
+}
+
+REQUIRED = {
+    "ngos": ["Name", "Latitude", "Longitude", "Food_Availability"],
+    "destinations": ["Name", "Latitude", "Longitude", "People in Need"],
+    "volunteers": ["Name", "Latitude", "Longitude"],
+}
+QUANTITY = {"ngos": "Food_Availability", "destinations": "People in Need"}
+
+
+def detect_format(filename):
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    if ext in ("json", "geojson"):
+        return "geojson"
+    if ext in ("parquet", "pq"):
+        return "parquet"
+    if ext == "csv":
+        return "csv"
+    raise ValueError(f"Unsupported file type '{ext}', expected one of {FORMATS}")
+
+
+def _csv_id_columns(source):
+    # Header columns that mean ID, read as text so a column with blanks gives "1", not "1.0"
+    position = source.tell() if hasattr(source, "seek") else None
+    header = pd.read_csv(source, nrows=0).columns
+    if position is not None:
+        source.seek(position)
+    return {c: str for c in header if ALIASES.get(str(c).strip().lower(), str(c).strip()) == "ID"}
+
+
+def _id_text(value):
+    # Whole-number floats (Parquet/GeoJSON IDs with gaps) lose their ".0"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def iter_chunks(source, fmt, chunksize=5000):
+    # DataFrame chunks from a path or file-like object
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=_csv_id_columns(source))
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif fmt == "geojson":
+        if hasattr(source, "read"):
+            data = json.load(source)
+        else:
+            with open(source) as f:
+                data = json.load(f)
+        features = data.get("features", [])
+        for start in range(0, len(features), chunksize):
+            rows = []
+            for feature in features[start:start + chunksize]:
+                row = dict(feature.get("properties") or {})
+                geometry = feature.get("geometry") or {}
+                if geometry.get("type") == "Point":
+                    row["Longitude"], row["Latitude"] = geometry["coordinates"][:2]
+                rows.append(row)
+            yield pd.DataFrame(rows)
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {FORMATS}")
+
+
+def normalize_columns(chunk):
+    return chunk.rename(columns=lambda c: ALIASES.get(str(c).strip().lower(), str(c).strip()))
+
+
+def validate_chunk(chunk, table):
+    """
+    Split a chunk into (valid, rejected) frames; rejected rows carry a 'Reason' column.
+    All checks are vectorized over the chunk.
+    """
+    chunk = normalize_columns(chunk)
+    missing_columns = [c for c in REQUIRED[table] if c not in chunk.columns]
+    if missing_columns:
+        rejected = chunk.assign(Reason=f"missing column(s): {', '.join(missing_columns)}")
+        return chunk.iloc[0:0], rejected
+
+    lat = pd.to_numeric(chunk["Latitude"], errors="coerce")
+    lon = pd.to_numeric(chunk["Longitude"], errors="coerce")
+    reason = pd.Series("", index=chunk.index, dtype=object)
+
+    name_missing = chunk["Name"].isna() | (chunk["Name"].astype(str).str.strip() == "")
+    reason = reason.mask(name_missing & (reason == ""), "missing Name")
+    reason = reason.mask((lat.isna() | lon.isna()) & (reason == ""), "missing or non-numeric coordinates")
+    out_of_range = (lat.abs() > 90) | (lon.abs() > 180)
+    reason = reason.mask(out_of_range & (reason == ""), "coordinates out of range")
+
+    if table in QUANTITY:
+        qty = pd.to_numeric(chunk[QUANTITY[table]], errors="coerce")
+        reason = reason.mask((qty.isna() | (qty < 0)) & (reason == ""), f"invalid {QUANTITY[table]}")
+        chunk = chunk.assign(**{QUANTITY[table]: qty})
+
+    chunk = chunk.assign(Latitude=lat, Longitude=lon)
+    if "ID" in chunk.columns:
+        ids = chunk["ID"].astype(object).where(chunk["ID"].notna(), None)
+        chunk = chunk.assign(ID=ids.map(lambda v: None if v is None else _id_text(v)))
+
+    bad = reason != ""
+    return chunk[~bad], chunk[bad].assign(Reason=reason[bad])
+
+
+def fill_coordinates(chunk, geocoder):
+    # Geocode the Address of rows that came without coordinates, one batch per chunk
+    chunk = normalize_columns(chunk)
+    if "Address" not in chunk.columns:
+        return chunk
+    for column in ("Latitude", "Longitude"):
+        if column not in chunk.columns:
+            chunk[column] = float("nan")
+    lat = pd.to_numeric(chunk["Latitude"], errors="coerce")
+    lon = pd.to_numeric(chunk["Longitude"], errors="coerce")
+    todo = (lat.isna() | lon.isna()) & chunk["Address"].notna()
+    if todo.any():
+        points = geocoder.geocode_batch(chunk.loc[todo, "Address"].tolist())
+        lat[todo] = [p[0] if p else float("nan") for p in points]
+        lon[todo] = [p[1] if p else float("nan") for p in points]
+    return chunk.assign(Latitude=lat, Longitude=lon)
+
+
+def bulk_import(source, table, fmt, chunksize=5000, repo=None, progress=None, geocoder=None):
+    """
+    Stream, validate, deduplicate and insert entities; returns a summary dict.
+    Args:
+        source: path or file-like object
+        table (str): 'ngos', 'destinations' or 'volunteers'
+        fmt (str): 'csv', 'parquet' or 'geojson'
+        chunksize (int): rows per chunk (and per transaction)
+        progress (callable): called with the running summary after every chunk
+        geocoder (GeocodingService): fills in coordinates from Address where they are missing
+    """
+    if table not in SCHEMAS:
+        raise ValueError(f"Unknown table '{table}', expected one of {sorted(SCHEMAS)}")
+    repo = repo or get_repository()
+    seen = repo.existing_ids(table)
+    summary = {"rows": 0, "inserted": 0, "invalid": 0, "duplicates": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    rejected = []
+
+    start = time.perf_counter()
+    for chunk in iter_chunks(source, fmt, chunksize):
+        summary["rows"] += len(chunk)
+        if geocoder is not None:
+            chunk = fill_coordinates(chunk, geocoder)
+        valid, invalid = validate_chunk(chunk, table)
+
+        if "ID" in valid.columns and len(valid):
+            ids = valid["ID"]
+            has_id = ids.notna().to_numpy()
+            dup = np.zeros(len(valid), dtype=bool)
+            dup[has_id] = ids[has_id].duplicated().to_numpy() | ids[has_id].isin(seen).to_numpy()
+            if dup.any():
+                rejected.append(valid[dup].assign(Reason="duplicate ID"))
+                summary["duplicates"] += int(dup.sum())
+                valid = valid[~dup]
+            seen.update(valid["ID"].dropna())
+
+        if len(valid):
+            # Rows without an ID get their rowid; later rows may not reuse those either
+            seen.update(repo.add_many(table, valid))
+            summary["inserted"] += len(valid)
+        if len(invalid):
+            rejected.append(invalid)
+            summary["invalid"] += len(invalid)
+
+        summary["seconds"] = time.perf_counter() - start
+        summary["rows_per_sec"] = summary["rows"] / summary["seconds"] if summary["seconds"] else 0.0
+        if progress:
+            progress(dict(summary))
+
+    summary["rejected"] = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import NGOs, destinations or volunteers")
+    parser.add_argument("table", choices=sorted(SCHEMAS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="detected from the file extension by default")
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--rejected", help="write rejected rows with their reason to this CSV")
+    parser.add_argument("--geocode", action="store_true", help="geocode the Address of rows without coordinates")
+    args = parser.parse_args()
+
+    geocoder = None
+    if args.geocode:
+        from geocoding import get_geocoding_service
+        geocoder = get_geocoding_service()
+
+    result = bulk_import(args.path, args.table, args.format or detect_format(args.path), args.chunksize,
+                         geocoder=geocoder,
+                         progress=lambda s: print(f"  {s['rows']} rows read, {s['inserted']} inserted, "
+                                                  f"{s['rows_per_sec']:.0f} rows/s"))
+    print(f"✅ {result['inserted']} of {result['rows']} rows imported into {args.table} in {result['seconds']:.2f}s "
+          f"({result['rows_per_sec']:.0f} rows/s); {result['invalid']} invalid, {result['duplicates']} duplicates")
+    if args.rejected and not result["rejected"].empty:
+        result["rejected"].to_csv(args.rejected, index=False)
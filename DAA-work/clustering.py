@@ -0,0 +1,138 @@
+import numpy as np
+
+from instrumentation import stage, timed
+from spatial_index import SpatialIndex
+
+
+# Splits NGOs and destinations into one group per volunteer. Everything works on plain
+# coordinate/label arrays; DataFrames are only touched once at the end to attach the labels.
+
+METHODS = ("auto", "kmeans", "minibatch")
+MINIBATCH_ABOVE = 10_000  # 'auto' switches to MiniBatchKMeans for more points than this
+
+
+def to_radians(frame):
+    # (n, 2) array of (lat, lon) in radians, converted in one vectorized call
+    return np.radians(frame[["Latitude", "Longitude"]].to_numpy(dtype=np.float64))
+
+
+def cluster_points(coords, n_clusters, method="auto", random_state=42, batch_size=4096):
+    """
+    Cluster points into at most n_clusters groups.
+    Args:
+        coords (np.ndarray): (n, 2) array of (lat, lon) in radians
+        n_clusters (int): wanted number of clusters, capped at the number of points
+        method (str): 'kmeans', 'minibatch' or 'auto' (MiniBatchKMeans for large inputs)
+    Returns (labels, centers) with centers in radians; centers has one row per cluster.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    if method not in METHODS:
+        raise ValueError(f"Unknown clustering method '{method}', expected one of {METHODS}")
+    k = min(n_clusters, len(coords))
+    if k == 0:
+        return np.empty(0, dtype=np.intp), np.empty((0, 2))
+    if k == 1:
+        return np.zeros(len(coords), dtype=np.intp), coords.mean(axis=0, keepdims=True)
+
+    if method == "minibatch" or (method == "auto" and len(coords) > MINIBATCH_ABOVE):
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=max(batch_size, 3 * k),
+                                n_init=1)
+    else:
+        model = KMeans(n_clusters=k, random_state=random_state, n_init="auto")
+    with stage(f"clustering.{type(model).__name__}"):
+        labels = model.fit_predict(coords)
+    return labels.astype(np.intp), model.cluster_centers_
+
+
+@timed("clustering.rebalance")
+def rebalance(coords, labels, centers, supply, need, is_dest, passes=3):
+    """
+    Move destinations out of clusters whose need exceeds their supply, one per cluster and
+    pass, each to the nearest other centroid.
+    Args:
+        coords (np.ndarray): (n, 2) array of (lat, lon) in radians
+        labels (np.ndarray): cluster of every point
+        centers (np.ndarray): centroids in radians
+        supply, need (np.ndarray): per-point food availability and need (0 where not applicable)
+        is_dest (np.ndarray): boolean mask of destination points
+    Returns (labels, order): the new labels and a sort key that puts moved destinations after
+    the ones already in their new cluster.
+    """
+    labels = labels.copy()
+    order = np.arange(len(labels))
+    k = len(centers)
+    if k < 2:
+        return labels, order
+
+    # Nearest other centroid of every destination, looked up once: of the two nearest
+    # centroids at least one is not the destination's own cluster
+    dest_idx = np.flatnonzero(is_dest)
+    _, nearest = SpatialIndex(np.degrees(centers)).query(np.degrees(coords[dest_idx]), k=2)
+    nearest = nearest.astype(np.intp)
+    alternative = np.full((len(labels), 2), -1, dtype=np.intp)
+    alternative[dest_idx] = nearest
+
+    cluster_supply = np.bincount(labels, weights=supply, minlength=k)
+    cluster_need = np.bincount(labels, weights=need, minlength=k)
+    next_order = len(labels)
+
+    for _ in range(passes):
+        # First destination (by current order) and destination count of every cluster
+        dests = dest_idx[np.lexsort((order[dest_idx], labels[dest_idx]))]
+        dest_count = np.bincount(labels[dests], minlength=k)
+        first = np.full(k, -1, dtype=np.intp)
+        starts = np.flatnonzero(np.r_[True, labels[dests][1:] != labels[dests][:-1]]) if len(dests) else []
+        first[labels[dests[starts]]] = dests[starts]
+
+        for cid in range(k):
+            if cluster_supply[cid] - cluster_need[cid] >= 0 or dest_count[cid] <= 1:
+                continue
+            i = first[cid]
+            target = alternative[i, 0] if alternative[i, 0] != cid else alternative[i, 1]
+            labels[i] = target
+            order[i] = next_order
+            next_order += 1
+            cluster_need[cid] -= need[i]
+            cluster_need[target] += need[i]
+            dest_count[cid] -= 1
+            dest_count[target] += 1
+            if first[target] < 0:
+                # Its first destination is now the one that just moved in
+                first[target] = i
+    return labels, order
+
+
+def assign_clusters(num_volunteers, ngos, destinations, method="auto", need_column="Adjusted Need", flows=None):
+    """
+    Cluster label (volunteer index) for every NGO and destination.
+    With fewer points than volunteers only as many clusters as points are formed; the
+    remaining volunteers get no stops.
+    Args:
+        flows (pd.DataFrame): NGO_pos/Destination_pos/Units rows from allocation.allocate_supply;
+            when given, every supplied destination joins the cluster of the NGO that ships it the
+            most, so each volunteer delivers the food they pick up, and no rebalancing is needed
+    Returns (ngo_labels, dest_labels, ngo_order, dest_order); sorting by (label, order) groups
+    the rows per volunteer the way the rebalancing left them.
+    """
+    n_ngo = len(ngos)
+    coords = np.vstack([to_radians(ngos), to_radians(destinations)])
+    labels, centers = cluster_points(coords, num_volunteers, method)
+
+    if flows is not None and len(flows):
+        # The largest flow into each destination decides its NGO
+        flows = flows.reset_index(drop=True)
+        main = flows.loc[flows.groupby("Destination_pos")["Units"].idxmax()]
+        dest_labels = labels[n_ngo:].copy()
+        dest_labels[main["Destination_pos"].to_numpy()] = labels[main["NGO_pos"].to_numpy()]
+        order = np.arange(len(coords))
+        return labels[:n_ngo], dest_labels, order[:n_ngo], order[n_ngo:]
+
+    supply = np.zeros(len(coords))
+    need = np.zeros(len(coords))
+    supply[:n_ngo] = ngos["Food_Availability"].to_numpy(dtype=np.float64)
+    need[n_ngo:] = destinations[need_column].to_numpy(dtype=np.float64)
+    is_dest = np.arange(len(coords)) >= n_ngo
+
+    labels, order = rebalance(coords, labels, centers, supply, need, is_dest)
+    return labels[:n_ngo], labels[n_ngo:], order[:n_ngo], order[n_ngo:]
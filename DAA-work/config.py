@@ -0,0 +1,31 @@
+import os
+
+
+# Settings shared across pages; each can be overridden through the environment (or a .env file)
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("FOOD_CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+
+ORS_API_KEY = os.environ.get("ORS_API_KEY", "5b3ce3597851110001cf6248d2d13a3a91b24d658890fe0b396b2550")
+ORS_BASE_URL = os.environ.get("ORS_BASE_URL", "https://api.openrouteservice.org")
+ORS_TIMEOUT = float(os.environ.get("ORS_TIMEOUT", "10"))
+ORS_MAX_WORKERS = int(os.environ.get("ORS_MAX_WORKERS", "8"))
+
+# "ors" for openrouteservice directions, "local" for in-process routing over the cached OSM graph
+ROUTING_BACKEND = os.environ.get("ROUTING_BACKEND", "ors")
+
+# SQLite database holding NGOs, destinations and volunteers
+DB_PATH = os.environ.get("FOOD_DB_PATH", os.path.join(BASE_DIR, "food.db"))
+
+# Geocoder used at volunteer registration: "nominatim", "gazetteer" (offline) or "chain" (gazetteer, then nominatim)
+GEOCODER_BACKEND = os.environ.get("GEOCODER_BACKEND", "chain")
+GEOCODER_MIN_INTERVAL = float(os.environ.get("GEOCODER_MIN_INTERVAL", "1.0"))  # Nominatim allows 1 request/s
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", os.path.join(BASE_DIR, "gazetteer.csv"))
+
+# Log every pipeline stage and external request as a JSON line on the 'food.metrics' logger
+METRICS_LOG = os.environ.get("FOOD_METRICS_LOG", "").lower() not in ("", "0", "false", "no")
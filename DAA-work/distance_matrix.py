@@ -0,0 +1,122 @@
+import numpy as np
+
+from geodistance import many_to_many, pairwise_km
+from instrumentation import timed
+from model import KINDS
+
+
+class DistanceMatrix:
+    """
+    Dense all-pairs distances (km) between NGOs, destinations and volunteers.
+    Rows and columns follow the same order: NGOs, then destinations, then volunteers,
+    each in the row order of the DataFrame they came from (the node IDs of model.Entities).
+    """
+
+    def __init__(self, km, coords, counts, source):
+        self.km = km
+        self.coords = coords
+        self.counts = dict(zip(KINDS, counts))
+        self.source = source
+
+        self.offsets = {}
+        offset = 0
+        for kind in KINDS:
+            self.offsets[kind] = offset
+            offset += self.counts[kind]
+
+    def __len__(self):
+        return len(self.km)
+
+    def index(self, kind, i):
+        # Matrix index of the i-th (positional) entity of the given kind
+        return self.offsets[kind] + i
+
+    def indices(self, kind):
+        return np.arange(self.offsets[kind], self.offsets[kind] + self.counts[kind])
+
+    def block(self, row_kind, col_kind):
+        return self.km[np.ix_(self.indices(row_kind), self.indices(col_kind))]
+
+    def route_length(self, route):
+        # Total km along a route given as matrix indices
+        route = np.asarray(route)
+        if len(route) < 2:
+            return 0.0
+        return float(self.km[route[:-1], route[1:]].sum())
+
+
+def _coords(df):
+    if df is None or df.empty:
+        return []
+    return list(zip(df["Latitude"].astype(float), df["Longitude"].astype(float)))
+
+
+def _road_matrix(coords, cutoff_km=None):
+    # networkx/osmnx are only imported when road distances are asked for
+    import networkx as nx
+    from road_network import get_road_network, nearest_nodes
+
+    region_key, G = get_road_network(coords)
+    osm_nodes = nearest_nodes(region_key, G, coords)
+
+    # Several entities can snap to the same intersection: search once per distinct node
+    distinct = list(dict.fromkeys(osm_nodes))
+    cutoff = cutoff_km * 1000 if cutoff_km is not None else None
+
+    km = np.full((len(coords), len(coords)), np.nan, dtype=np.float64)
+    targets = np.array(osm_nodes)
+    for origin in distinct:
+        lengths = nx.single_source_dijkstra_path_length(G, origin, cutoff=cutoff, weight="length")
+        row = np.array([lengths.get(t, np.nan) for t in targets], dtype=np.float64) / 1000
+        km[targets == origin] = row
+
+    np.fill_diagonal(km, 0.0)
+    return km
+
+
+@timed("distance_matrix")
+def build_distance_matrix(ngos, destinations, volunteers=None, use_roads=False, cutoff_km=None, ellipsoid=False):
+    """
+    Distances between every NGO, destination and volunteer in one call.
+    Args:
+        ngos (pd.DataFrame): NGOs with Latitude/Longitude
+        destinations (pd.DataFrame): Destinations with Latitude/Longitude
+        volunteers (pd.DataFrame): Volunteers with Latitude/Longitude (optional)
+        use_roads (bool): Drive distances over the cached road network instead of great-circle
+        cutoff_km (float): Stop each road search beyond this distance (bounded one-to-many)
+        ellipsoid (bool): WGS-84 accurate great-circle distances instead of haversine
+    """
+    groups = [_coords(ngos), _coords(destinations), _coords(volunteers)]
+    coords = [c for group in groups for c in group]
+
+    source = "great-circle"
+    km = None
+    if use_roads and len(coords) > 1:
+        try:
+            km = _road_matrix(coords, cutoff_km)
+            source = "road"
+        except Exception:
+            km = None
+
+    points = np.array(coords, dtype=np.float64).reshape(-1, 2)
+    if km is None:
+        km = many_to_many(points, ellipsoid=ellipsoid)
+    else:
+        # Unreachable pairs (or beyond the cutoff) fall back to great-circle distance
+        rows, cols = np.nonzero(np.isnan(km))
+        km[rows, cols] = pairwise_km(points[rows], points[cols], ellipsoid=ellipsoid)
+
+    return DistanceMatrix(km, points, [len(g) for g in groups], source)
+
+
+def greedy_order(km, start, stops):
+    # Nearest-neighbour tour over matrix indices, starting from (and excluding) start
+    remaining = list(stops)
+    order = []
+    current = start
+    while remaining:
+        dists = km[current, remaining]
+        nxt = remaining.pop(int(np.argmin(dists)))
+        order.append(nxt)
+        current = nxt
+    return order
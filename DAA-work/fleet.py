@@ -0,0 +1,134 @@
+import heapq
+
+import numpy as np
+
+
+# Units of food each vehicle type can carry in one trip
+VEHICLE_CAPACITY = {
+    "Bike": 20,
+    "Car": 80,
+    "Van": 300,
+    "Truck": 1000,
+}
+DEFAULT_VEHICLE = "Car"
+
+
+def vehicle_capacities(volunteers, capacity_table=None):
+    # Capacity per volunteer (row order) from the 'Vehicle Type' captured at registration
+    table = capacity_table or VEHICLE_CAPACITY
+    if "Vehicle Type" in volunteers.columns:
+        types = volunteers["Vehicle Type"].fillna(DEFAULT_VEHICLE)
+    else:
+        types = [DEFAULT_VEHICLE] * len(volunteers)
+    return np.array([table.get(t, table.get(DEFAULT_VEHICLE, 1)) for t in types], dtype=np.float64)
+
+
+def greedy_flows(km_ngo_dest, supply, need):
+    """
+    Split NGO supply over destinations, nearest NGO first (used without a min-cost allocation).
+    Returns a list of (ngo, destination, units) flows, positional indices.
+    """
+    remaining = np.asarray(supply, dtype=np.float64).copy()
+    flows = []
+    for d in np.argsort(-np.asarray(need, dtype=np.float64), kind="stable"):
+        wanted = float(need[d])
+        for n in np.argsort(km_ngo_dest[:, d], kind="stable"):
+            if wanted <= 0:
+                break
+            units = min(wanted, remaining[n])
+            if units > 0:
+                flows.append((int(n), int(d), units))
+                remaining[n] -= units
+                wanted -= units
+    return flows
+
+
+def assign_capacitated(matrix, ngos, destinations, volunteers, capacity_table=None, makespan_weight=1.0,
+                       flows=None):
+    """
+    Capacitated VRP assignment: every trip is one pickup at an NGO and one drop at a destination,
+    sized to fit the vehicle that makes it.
+    Args:
+        matrix (DistanceMatrix): distances over ngos, destinations and volunteers (same row order)
+        ngos (pd.DataFrame): NGOs with Food_Availability
+        destinations (pd.DataFrame): Destinations with Adjusted Need (or People in Need)
+        volunteers (pd.DataFrame): Volunteers with Vehicle Type
+        capacity_table (dict): units per vehicle type, VEHICLE_CAPACITY by default
+        makespan_weight (float): weight of the longest volunteer route against total distance
+        flows (pd.DataFrame): NGO_pos/Destination_pos/Units rows from allocation.allocate_supply to
+            carry; without them supply is split nearest NGO first (greedy_flows)
+    Returns a list with, per volunteer, a dict of route (matrix indices), loads and km.
+    """
+    km = matrix.km
+    capacities = vehicle_capacities(volunteers, capacity_table)
+    if (capacities <= 0).any():
+        bad = sorted(t for t, c in (capacity_table or VEHICLE_CAPACITY).items() if c <= 0)
+        raise ValueError(f"Vehicle capacities must be positive, got <= 0 for: {', '.join(bad)}")
+    need_column = "Adjusted Need" if "Adjusted Need" in destinations.columns else "People in Need"
+
+    if flows is not None:
+        flows = list(zip(flows["NGO_pos"].tolist(), flows["Destination_pos"].tolist(),
+                         flows["Units"].astype(float).tolist()))
+    else:
+        flows = greedy_flows(matrix.block("NGO", "Destination"),
+                             ngos["Food_Availability"].to_numpy(dtype=np.float64),
+                             destinations[need_column].to_numpy(dtype=np.float64))
+    if len(capacities) == 0:
+        return []
+
+    positions = np.array([matrix.index("Volunteer", v) for v in range(len(volunteers))])
+    vehicle_km = np.zeros(len(volunteers))
+    assigned = [[] for _ in range(len(volunteers))]
+    makespan = 0.0
+
+    # Largest flows first. Each vehicle could take the next trip loaded to its own capacity; it goes
+    # to the cheapest distance + makespan increase per unit carried, and the rest of the flow goes
+    # back in the queue, so small vehicles can take trips off a large one that sets the makespan
+    queue = [(-units, n, d) for n, d, units in flows if units > 0]
+    heapq.heapify(queue)
+    while queue:
+        units, n, d = heapq.heappop(queue)
+        units = -units
+        pickup, drop = matrix.index("NGO", n), matrix.index("Destination", d)
+
+        added = km[positions, pickup] + km[pickup, drop]
+        new_km = vehicle_km + added
+        cost = added + makespan_weight * np.maximum(new_km - makespan, 0.0)
+        loads = np.minimum(units, capacities)
+        best = int(np.argmin(cost / loads))
+        load = float(loads[best])
+
+        assigned[best].append((pickup, drop, load))
+        vehicle_km[best] = new_km[best]
+        positions[best] = drop
+        makespan = max(makespan, vehicle_km[best])
+        if units - load > 0:
+            heapq.heappush(queue, (-(units - load), n, d))
+
+    plans = []
+    for v, vehicle_trips in enumerate(assigned):
+        start = matrix.index("Volunteer", v)
+
+        # Trips nearest-first from wherever the vehicle currently is, unless that comes out longer
+        # than the order they were assigned in (which is what the makespan above was measured on)
+        remaining = list(vehicle_trips)
+        ordered = []
+        current = start
+        while remaining:
+            nxt = min(range(len(remaining)), key=lambda i: km[current, remaining[i][0]])
+            ordered.append(remaining.pop(nxt))
+            current = ordered[-1][1]
+        candidates = [[start] + [stop for trip in trips for stop in trip[:2]] for trips in (ordered, vehicle_trips)]
+        lengths = [matrix.route_length(candidate) for candidate in candidates]
+        best_order = int(np.argmin(lengths))
+        route = candidates[best_order]
+        loads = [0.0] + [load for trip in (ordered, vehicle_trips)[best_order] for load in (trip[2], -trip[2])]
+
+        plans.append({
+            "route": route,
+            "loads": loads,
+            "trips": len(vehicle_trips),
+            "capacity": float(capacities[v]),
+            "km": matrix.route_length(route),
+        })
+    return plans
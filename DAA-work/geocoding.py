@@ -0,0 +1,187 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from config import CACHE_DIR, GAZETTEER_PATH, GEOCODER_BACKEND, GEOCODER_MIN_INTERVAL
+from instrumentation import record_request, register_cache
+
+
+# Address -> (lat, lon) lookups for volunteer registration. Results are kept in memory and in a
+# SQLite file keyed by the normalized address, so repeated addresses never reach the network.
+# Backends are pluggable; the gazetteer one works fully offline.
+
+
+def normalize_address(address):
+    # "  VIT, Chennai " -> "vit chennai"
+    address = re.sub(r"[^\w\s]", " ", str(address).lower())
+    return re.sub(r"\s+", " ", address).strip()
+
+
+class RateLimiter:
+    # At most one call per min_interval seconds across all threads
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next:
+                time.sleep(self._next - now)
+            self._next = max(now, self._next) + self.min_interval
+
+
+# Nominatim's usage limit applies to the whole process, however many backends are created
+_nominatim_limiter = RateLimiter(GEOCODER_MIN_INTERVAL)
+
+
+class NominatimBackend:
+    name = "nominatim"
+
+    def __init__(self, user_agent="food-distribution-app", min_interval=None, timeout=10):
+        from geopy.geocoders import Nominatim
+        self.geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+        # A backend gets its own limiter only when it asks for a different interval
+        self.limiter = _nominatim_limiter if min_interval is None else RateLimiter(min_interval)
+
+    def geocode(self, address):
+        self.limiter.wait()
+        location = self.geolocator.geocode(address)
+        return (location.latitude, location.longitude) if location else None
+
+
+class GazetteerBackend:
+    """
+    Offline lookups from a CSV of address,lat,lon rows (matched on the normalized address).
+    Also serves as a local stub: pass places={...} directly.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, path=GAZETTEER_PATH, places=None):
+        self.places = {}
+        if places is None and path and os.path.exists(path):
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    self.places[normalize_address(row["address"])] = (float(row["lat"]), float(row["lon"]))
+        for address, point in (places or {}).items():
+            self.places[normalize_address(address)] = tuple(point)
+
+    def geocode(self, address):
+        return self.places.get(normalize_address(address))
+
+
+class ChainBackend:
+    # First backend that finds the address wins
+    name = "chain"
+
+    def __init__(self, *backends):
+        self.backends = backends
+
+    def geocode(self, address):
+        for backend in self.backends:
+            point = backend.geocode(address)
+            if point:
+                return point
+        return None
+
+
+def make_backend(name=None):
+    name = name or GEOCODER_BACKEND
+    if name == "nominatim":
+        return NominatimBackend()
+    if name == "gazetteer":
+        return GazetteerBackend()
+    if name == "chain":
+        return ChainBackend(GazetteerBackend(), NominatimBackend())
+    raise ValueError(f"Unknown geocoder backend '{name}', expected nominatim, gazetteer or chain")
+
+
+class GeocodingService:
+    def __init__(self, backend=None, cache_path=None):
+        self.backend = backend or make_backend()
+        self.cache_path = cache_path or os.path.join(CACHE_DIR, "geocode.sqlite")
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_found": 0}
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS geocodes (address TEXT PRIMARY KEY, lat REAL, lon REAL)")
+            self._memory.update((a, (lat, lon)) for a, lat, lon in conn.execute("SELECT * FROM geocodes"))
+        register_cache("geocode", lambda: (self.stats["hits"], self.stats["misses"]))
+
+    def _connect(self):
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    def _store(self, results):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?)",
+                             [(a, lat, lon) for a, (lat, lon) in results.items()])
+
+    def geocode(self, address):
+        # (lat, lon) or None; a cached address is a dictionary lookup
+        key = normalize_address(address)
+        point = self._memory.get(key)
+        if point is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return point
+        return self.geocode_batch([address])[0]
+
+    def geocode_batch(self, addresses, progress=None):
+        """
+        Geocode many addresses; duplicates and cached addresses cost nothing, the rest go
+        through the backend one at a time within its rate limit.
+        Returns (lat, lon) or None per address, in input order.
+        """
+        keys = [normalize_address(a) for a in addresses]
+        queue = {}
+        for key, address in zip(keys, addresses):
+            if key and key not in self._memory and key not in queue:
+                queue[key] = address
+        with self._lock:
+            self.stats["hits"] += sum(1 for k in keys if k in self._memory)
+
+        found = {}
+        for done, (key, address) in enumerate(queue.items(), 1):
+            with self._lock:
+                self.stats["misses"] += 1
+            start = time.perf_counter()
+            try:
+                point = self.backend.geocode(address)
+                record_request(f"geocode_{self.backend.name}", time.perf_counter() - start)
+            except Exception:
+                point = None
+                record_request(f"geocode_{self.backend.name}", time.perf_counter() - start, ok=False)
+            if point:
+                found[key] = (float(point[0]), float(point[1]))
+            else:
+                with self._lock:
+                    self.stats["not_found"] += 1
+            if progress:
+                progress(done, len(queue))
+
+        if found:
+            with self._lock:
+                self._memory.update(found)
+            self._store(found)
+        return [self._memory.get(k) for k in keys]
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_geocoding_service():
+    # Shared per-process service: one backend, rate limit and address cache for every page and import
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = GeocodingService()
+        return _service
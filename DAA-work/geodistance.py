@@ -0,0 +1,103 @@
+import numpy as np
+
+
+# Vectorized great-circle distances in km on float64 (lat, lon) degree arrays
+
+EARTH_RADIUS_KM = 6371.0088
+
+# WGS-84 ellipsoid, used by the accurate (Vincenty) mode
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+
+def _as_points(points):
+    points = np.asarray(points, dtype=np.float64)
+    return points.reshape(-1, 2)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # Broadcasts like any NumPy ufunc
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def vincenty_km(lat1, lon1, lat2, lon2, max_iter=50, tol=1e-12):
+    # Inverse Vincenty on WGS-84; the few near-antipodal pairs that do not converge use haversine
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (lat1, lon1, lat2, lon2)))
+    f = WGS84_F
+
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt((cosU2 * sin_lam) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cos_lam) ** 2)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam - lam_prev) < tol
+            if converged.all():
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        km = WGS84_B * A * (sigma - delta_sigma)
+
+    bad = ~converged | ~np.isfinite(km)
+    if bad.any():
+        km = np.where(bad, haversine_km(lat1, lon1, lat2, lon2), km)
+    return km
+
+
+def _kernel(ellipsoid):
+    return vincenty_km if ellipsoid else haversine_km
+
+
+def one_to_many(point, points, ellipsoid=False):
+    """
+    Distances (km) from one (lat, lon) to each row of an (n, 2) array.
+    Args:
+        point (tuple): (lat, lon) in degrees
+        points (array-like): (n, 2) array of (lat, lon) in degrees
+        ellipsoid (bool): WGS-84 accurate distances instead of the spherical approximation
+    """
+    points = _as_points(points)
+    return _kernel(ellipsoid)(point[0], point[1], points[:, 0], points[:, 1])
+
+
+def many_to_many(a, b=None, ellipsoid=False):
+    # (len(a), len(b)) distance matrix in km; b defaults to a
+    a = _as_points(a)
+    b = a if b is None else _as_points(b)
+    return _kernel(ellipsoid)(a[:, 0, None], a[:, 1, None], b[None, :, 0], b[None, :, 1])
+
+
+def pairwise_km(a, b, ellipsoid=False):
+    # Row-wise distances between two equally long (n, 2) arrays
+    a, b = _as_points(a), _as_points(b)
+    return _kernel(ellipsoid)(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+
+def path_length_km(points, ellipsoid=False):
+    points = _as_points(points)
+    if len(points) < 2:
+        return 0.0
+    return float(pairwise_km(points[:-1], points[1:], ellipsoid).sum())
@@ -0,0 +1,304 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from geodistance import many_to_many, one_to_many, pairwise_km, path_length_km
+from instrumentation import timed
+from model import Route, Stop
+from route_optimizer import improve_route
+
+
+# Incremental re-planning: apply one insert/update/delete of an NGO, destination or volunteer
+# to an existing plan by repairing only the routes it touches (cheapest insertion followed by
+# local search on those routes), instead of re-clustering and re-routing everyone.
+
+KINDS = ("NGO", "Destination", "Volunteer")
+CANDIDATE_ROUTES = 3  # nearest routes considered when inserting a stop
+
+
+class PlannedRoute:
+    __slots__ = ("volunteer_id", "name", "start", "stops")
+
+    def __init__(self, volunteer_id, name, start, stops=None):
+        self.volunteer_id = volunteer_id
+        self.name = name
+        self.start = tuple(start)
+        self.stops = list(stops or [])  # [(kind, entity_id, lat, lon, quantity)]
+
+    def points(self):
+        return [self.start] + [(s[2], s[3]) for s in self.stops]
+
+    def loads(self, stops=None):
+        # Load delta per position (start first); drops scaled to what the route picks up
+        stops = self.stops if stops is None else stops
+        pickups = sum(s[4] for s in stops if s[0] == "NGO")
+        drops = sum(s[4] for s in stops if s[0] == "Destination")
+        scale = min(1.0, pickups / drops) if drops else 1.0
+        return [0.0] + [s[4] if s[0] == "NGO" else -s[4] * scale for s in stops]
+
+    def km(self):
+        return path_length_km(self.points())
+
+    def as_route(self, labels=None):
+        # model.Route of this plan; labels gives (name, units) per (kind, entity_id) where known
+        labels = labels or {}
+        start = Stop(-1, "Volunteer", self.volunteer_id, self.name, self.start[0], self.start[1], 0.0)
+        stops = [start]
+        for kind, entity_id, lat, lon, qty in self.stops:
+            name, units = labels.get((kind, entity_id), (None, qty))
+            stops.append(Stop(-1, kind, entity_id, name, lat, lon, units))
+        return Route(self.name, stops, self.km())
+
+
+def _feasible(loads):
+    carried = np.cumsum(loads)
+    return carried.min() >= -1e-9
+
+
+class IncrementalPlanner:
+    def __init__(self, routes, time_budget=0.2):
+        self.routes = {r.volunteer_id: r for r in routes}
+        self.time_budget = time_budget
+        self.labels = {}  # (kind, entity_id) -> (name, units) shown on the map for planned stops
+
+    @classmethod
+    def from_routes(cls, volunteers, ngos, destinations, routes, need_column="People in Need", time_budget=0.2):
+        """
+        Build a planner from the route page's output.
+        Args:
+            volunteers, ngos, destinations (pd.DataFrame): entities the routes were planned for
+            routes (dict): volunteer name -> model.Route with the volunteer's start first
+        """
+        # Quantities as planned from, keyed by entity ID (routes carry the scaled need)
+        quantity = {
+            "NGO": dict(zip(ngos["ID"], ngos["Food_Availability"].astype(float))),
+            "Destination": dict(zip(destinations["ID"], destinations[need_column].astype(float))),
+        }
+
+        names = volunteers["Name"] if "Name" in volunteers.columns else [f"Volunteer_{i}" for i in volunteers.index]
+        planned = []
+        for vol_id, name, lat, lon in zip(volunteers["ID"], names, volunteers["Latitude"], volunteers["Longitude"]):
+            route = routes.get(name)
+            stops = [(s.kind, s.id, s.lat, s.lon, quantity[s.kind].get(s.id, s.qty))
+                     for s in (route.stops[1:] if route is not None else ()) if s.kind in quantity]
+            planned.append(PlannedRoute(vol_id, name, (lat, lon), stops))
+        planner = cls(planned, time_budget)
+        planner.labels = {(s.kind, s.id): (s.name, s.qty) for route in routes.values() for s in route.stops}
+        return planner
+
+    # ---- queries -------------------------------------------------------------------------
+
+    def as_routes(self):
+        # volunteer name -> model.Route like build_volunteer_routes, skipping empty routes
+        return {r.name: r.as_route(self.labels) for r in self.routes.values() if r.stops}
+
+    def _find(self, kind, entity_id):
+        for route in self.routes.values():
+            for pos, stop in enumerate(route.stops):
+                if stop[0] == kind and stop[1] == entity_id:
+                    return route, pos
+        return None, None
+
+    def _nearest_routes(self, lat, lon, k=CANDIDATE_ROUTES, exclude=None):
+        routes = [r for r in self.routes.values() if r.volunteer_id != exclude]
+        if not routes:
+            return []
+        # Distance to a route = distance to its closest point (start or any stop)
+        dist = [one_to_many((lat, lon), r.points()).min() for r in routes]
+        return [routes[i] for i in np.argsort(dist, kind="stable")[:k]]
+
+    # ---- repairs -------------------------------------------------------------------------
+
+    def _cheapest_insertion(self, route, stop):
+        # Best position for stop in route (1..len), or None if no position keeps the loads feasible
+        points = np.asarray(route.points())
+        p = np.asarray(stop[2:4], dtype=np.float64)
+        to_p = one_to_many(p, points)
+        edges = np.append(pairwise_km(points[:-1], points[1:]) if len(points) > 1 else [], 0.0)
+        # Inserting after position i: d(i, p) + d(p, i+1) - d(i, i+1); after the last point only d(i, p)
+        after = np.append(to_p[1:], 0.0)
+        costs = to_p + after - edges
+        for i in np.argsort(costs, kind="stable"):
+            candidate = route.stops[:i] + [stop] + route.stops[i:]
+            if _feasible(route.loads(candidate)):
+                return int(i) + 1, float(costs[i])
+        return None, None
+
+    def _reoptimize(self, route):
+        if len(route.stops) < 2:
+            return
+        points = np.asarray(route.points())
+        order = improve_route(many_to_many(points), list(range(len(points))), route.loads(),
+                              time_budget=self.time_budget)
+        route.stops = [route.stops[i - 1] for i in order[1:]]
+
+    def _insert_stop(self, stop, exclude=None):
+        best = None
+        for route in self._nearest_routes(stop[2], stop[3], exclude=exclude):
+            pos, cost = self._cheapest_insertion(route, stop)
+            if pos is not None and (best is None or cost < best[2]):
+                best = (route, pos, cost)
+        if best is None:
+            return None
+        route, pos, _ = best
+        route.stops.insert(pos - 1, stop)
+        self._reoptimize(route)
+        return route
+
+    @timed("incremental.apply")
+    def apply(self, delta):
+        """
+        Apply one change and repair the affected routes only.
+        Args:
+            delta (dict): op ('insert', 'update' or 'delete'), kind ('NGO', 'Destination' or
+                'Volunteer'), id, and for inserts/updates lat, lon, quantity (and name for volunteers)
+        Returns a report of what was touched and how much of the plan was left alone. Stops no
+        route can take (e.g. all candidates would run out of food) are listed under 'unplaced';
+        the plan no longer covers them, so the caller should re-plan from scratch.
+        """
+        start = time.perf_counter()
+        op, kind, entity_id = delta["op"], delta["kind"], delta["id"]
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}', expected one of {KINDS}")
+        touched, unplaced = set(), []
+
+        if kind == "Volunteer":
+            touched, unplaced = self._apply_volunteer(op, delta)
+        else:
+            # Planned name and units no longer describe a changed stop
+            self.labels.pop((kind, entity_id), None)
+            if op in ("update", "delete"):
+                route, pos = self._find(kind, entity_id)
+                if route is not None:
+                    old = route.stops.pop(pos)
+                    touched.add(route.volunteer_id)
+                    if op == "update" and (delta.get("lat", old[2]), delta.get("lon", old[3])) == (old[2], old[3]):
+                        # Quantity-only change: keep the stop where it was if the loads still work
+                        stop = (kind, entity_id, old[2], old[3], float(delta.get("quantity", old[4])))
+                        candidate = route.stops[:pos] + [stop] + route.stops[pos:]
+                        if _feasible(route.loads(candidate)):
+                            route.stops = candidate
+                            return self._report(op, kind, touched, unplaced, start)
+                    if op == "delete":
+                        self._reoptimize(route)
+            if op in ("insert", "update"):
+                stop = (kind, entity_id, float(delta["lat"]), float(delta["lon"]), float(delta.get("quantity", 0)))
+                route = self._insert_stop(stop)
+                if route is not None:
+                    touched.add(route.volunteer_id)
+                else:
+                    unplaced.append(stop)
+
+        return self._report(op, kind, touched, unplaced, start)
+
+    def _apply_volunteer(self, op, delta):
+        vid = delta["id"]
+        touched, unplaced = set(), []
+
+        if op in ("delete", "update") and vid in self.routes:
+            old = self.routes.pop(vid)
+            touched.add(vid)
+            if op == "update":
+                name = delta.get("name", old.name)
+                start = (float(delta.get("lat", old.start[0])), float(delta.get("lon", old.start[1])))
+                self.routes[vid] = PlannedRoute(vid, name, start, old.stops)
+                self._reoptimize(self.routes[vid])
+                return touched, unplaced
+            # Hand the removed volunteer's stops to the neighbouring routes
+            for stop in old.stops:
+                route = self._insert_stop(stop)
+                if route is not None:
+                    touched.add(route.volunteer_id)
+                else:
+                    unplaced.append(stop)
+            return touched, unplaced
+
+        if op == "insert":
+            new = PlannedRoute(vid, delta.get("name", f"Volunteer_{vid}"), (float(delta["lat"]), float(delta["lon"])))
+            # Take over the stops of nearby routes that are closer to the new volunteer than to their own start
+            for route in self._nearest_routes(*new.start, exclude=vid):
+                stops = np.asarray([(s[2], s[3]) for s in route.stops]).reshape(-1, 2)
+                if not len(stops):
+                    continue
+                closer = one_to_many(new.start, stops) < one_to_many(route.start, stops)
+                if closer.any():
+                    moved = [s for s, c in zip(route.stops, closer) if c]
+                    kept = [s for s, c in zip(route.stops, closer) if not c]
+                    if _feasible(route.loads(kept)) and _feasible(new.loads(new.stops + moved)):
+                        route.stops, new.stops = kept, new.stops + moved
+                        self._reoptimize(route)
+                        touched.add(route.volunteer_id)
+            self.routes[vid] = new
+            self._reoptimize(new)
+            touched.add(vid)
+        return touched, unplaced
+
+    def _report(self, op, kind, touched, unplaced, start):
+        total_routes = len(self.routes)
+        total_stops = sum(len(r.stops) for r in self.routes.values())
+        touched_stops = sum(len(self.routes[v].stops) for v in touched if v in self.routes)
+        return {
+            "op": op,
+            "kind": kind,
+            "routes_touched": sorted(touched, key=str),
+            "unplaced": [(s[0], s[1]) for s in unplaced],
+            "routes_total": total_routes,
+            "routes_skipped": total_routes - len(touched & set(self.routes)),
+            "stops_skipped": total_stops - touched_stops,
+            "skipped_fraction": 1 - len(touched & set(self.routes)) / total_routes if total_routes else 1.0,
+            "seconds": time.perf_counter() - start,
+        }
+
+
+def entity_state(ngos, destinations, volunteers, need_column="People in Need"):
+    # One row per entity (kind, id, lat, lon, quantity, name), the last row winning for a repeated ID
+    parts = []
+    for kind, frame, qty in (("NGO", ngos, "Food_Availability"), ("Destination", destinations, need_column),
+                             ("Volunteer", volunteers, None)):
+        parts.append(pd.DataFrame({
+            "kind": kind,
+            "id": frame["ID"].to_numpy(dtype=object),
+            "lat": frame["Latitude"].to_numpy(dtype=np.float64),
+            "lon": frame["Longitude"].to_numpy(dtype=np.float64),
+            "quantity": frame[qty].to_numpy(dtype=np.float64) if qty else 0.0,
+            "name": frame["Name"].to_numpy(dtype=object) if kind == "Volunteer" and "Name" in frame.columns
+            else None,
+        }))
+    state = pd.concat(parts, ignore_index=True)
+    return state.drop_duplicates(["kind", "id"], keep="last").reset_index(drop=True)
+
+
+def diff_entities(known, ngos, destinations, volunteers, need_column="People in Need"):
+    """
+    Deltas between the entities a plan was built for and the current tables.
+    Args:
+        known (pd.DataFrame): entity_state of the planned entities, None for an empty plan
+        need_column (str): raw need by default, so a rescaled 'Adjusted Need' does not mark every
+            destination as changed (routes scale drops to their own supply anyway)
+    Returns (deltas, current) where current is the entity_state to keep as the next known.
+    """
+    current = entity_state(ngos, destinations, volunteers, need_column)
+    if known is None:
+        known = current.iloc[:0]
+
+    keys = ["kind", "id"]
+    values = ["lat", "lon", "quantity"]
+    merged = current.merge(known[keys + values], on=keys, how="left", suffixes=("", "_known"), indicator=True)
+    inserted = (merged["_merge"] == "left_only").to_numpy()
+    same = np.ones(len(merged), dtype=bool)
+    for col in values:
+        now, before = merged[col].to_numpy(), merged[f"{col}_known"].to_numpy()
+        same &= (now == before) | (np.isnan(now) & np.isnan(before))
+    changed = inserted | ~same
+
+    deleted = known[keys].merge(current[keys], on=keys, how="left", indicator=True)
+    deltas = [{"op": "delete", "kind": kind, "id": entity_id}
+              for kind, entity_id in deleted.loc[deleted["_merge"] == "left_only", keys].itertuples(index=False)]
+    for row, insert in zip(merged[changed].itertuples(index=False), inserted[changed]):
+        delta = {"op": "insert" if insert else "update", "kind": row.kind, "id": row.id,
+                 "lat": float(row.lat), "lon": float(row.lon), "quantity": float(row.quantity)}
+        if row.kind == "Volunteer" and not pd.isna(row.name):
+            delta["name"] = row.name
+        deltas.append(delta)
+    return deltas, current
@@ -0,0 +1,203 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config import METRICS_LOG
+
+
+# Process-wide metrics for the planning pipeline: wall time and call counts per stage, plain
+# counters, latency of requests to external services, and hit rates of the caches. Read them
+# with snapshot(), export them with to_prometheus() or log_snapshot(), or show them with
+# diagnostics_panel() on a Streamlit page. With FOOD_METRICS_LOG set, every finished stage and
+# external request is also logged as one JSON line on the 'food.metrics' logger.
+
+logger = logging.getLogger("food.metrics")
+
+_lock = threading.Lock()
+_stages = {}      # name -> {'calls', 'errors', 'seconds', 'max_seconds', 'last_seconds'}
+_counters = {}    # name -> value
+_requests = {}    # service -> {'calls', 'errors', 'seconds', 'max_seconds'}
+_cache_sources = {}  # name -> callable returning (hits, misses)
+
+
+def _log(event, **fields):
+    if METRICS_LOG:
+        logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+
+def record_stage(name, seconds, error=False):
+    with _lock:
+        s = _stages.setdefault(name, {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                      "last_seconds": 0.0})
+        s["calls"] += 1
+        s["errors"] += int(error)
+        s["seconds"] += seconds
+        s["max_seconds"] = max(s["max_seconds"], seconds)
+        s["last_seconds"] = seconds
+    _log("stage", stage=name, seconds=round(seconds, 6), error=error)
+
+
+@contextmanager
+def stage(name):
+    # with stage("kmeans"): ...
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start, error)
+
+
+def timed(name=None):
+    # Decorator form of stage(); the name defaults to the function's qualified name
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def record_request(service, seconds, ok=True):
+    # One call to an external service (ORS, Nominatim, OSM downloads, ...)
+    with _lock:
+        r = _requests.setdefault(service, {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0})
+        r["calls"] += 1
+        r["errors"] += int(not ok)
+        r["seconds"] += seconds
+        r["max_seconds"] = max(r["max_seconds"], seconds)
+    _log("request", service=service, seconds=round(seconds, 6), ok=ok)
+
+
+def register_cache(name, hits_misses):
+    """
+    Report a cache's hit rate alongside the other metrics.
+    Args:
+        hits_misses (callable): returns (hits, misses) when metrics are read
+    """
+    with _lock:
+        _cache_sources[name] = hits_misses
+
+
+def _caches():
+    out = {}
+    for name, source in list(_cache_sources.items()):
+        try:
+            hits, misses = source()
+        except Exception:
+            continue
+        total = hits + misses
+        out[name] = {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+    return out
+
+
+def snapshot():
+    with _lock:
+        stages = {k: dict(v) for k, v in _stages.items()}
+        counters = dict(_counters)
+        requests = {k: dict(v) for k, v in _requests.items()}
+    for r in requests.values():
+        r["mean_seconds"] = r["seconds"] / r["calls"] if r["calls"] else 0.0
+    return {"stages": stages, "counters": counters, "requests": requests, "caches": _caches()}
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _requests.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def to_prometheus(snap=None, prefix="food"):
+    # Prometheus text exposition format
+    snap = snap or snapshot()
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        if not samples:
+            return
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{prefix}_{name}{{{label_text}}} {value:.6g}" if label_text else f"{prefix}_{name} {value:.6g}")
+
+    stages, requests, caches = snap["stages"], snap["requests"], snap["caches"]
+    metric("stage_calls_total", "counter", "Calls per pipeline stage",
+           [({"stage": k}, v["calls"]) for k, v in stages.items()])
+    metric("stage_errors_total", "counter", "Pipeline stage calls that raised",
+           [({"stage": k}, v["errors"]) for k, v in stages.items()])
+    metric("stage_seconds_total", "counter", "Wall time spent per pipeline stage",
+           [({"stage": k}, v["seconds"]) for k, v in stages.items()])
+    metric("stage_seconds_max", "gauge", "Slowest single call per pipeline stage",
+           [({"stage": k}, v["max_seconds"]) for k, v in stages.items()])
+    metric("events_total", "counter", "Event counters",
+           [({"name": k}, v) for k, v in snap["counters"].items()])
+    metric("external_requests_total", "counter", "Requests to external services",
+           [({"service": k}, v["calls"]) for k, v in requests.items()])
+    metric("external_request_errors_total", "counter", "Failed requests to external services",
+           [({"service": k}, v["errors"]) for k, v in requests.items()])
+    metric("external_request_seconds_total", "counter", "Time spent waiting on external services",
+           [({"service": k}, v["seconds"]) for k, v in requests.items()])
+    metric("external_request_seconds_max", "gauge", "Slowest request per external service",
+           [({"service": k}, v["max_seconds"]) for k, v in requests.items()])
+    metric("cache_hits_total", "counter", "Cache hits", [({"cache": k}, v["hits"]) for k, v in caches.items()])
+    metric("cache_misses_total", "counter", "Cache misses", [({"cache": k}, v["misses"]) for k, v in caches.items()])
+    metric("cache_hit_ratio", "gauge", "Cache hit ratio", [({"cache": k}, v["hit_rate"]) for k, v in caches.items()])
+    return "\n".join(lines) + "\n"
+
+
+def log_snapshot(level=logging.INFO):
+    # The whole snapshot as one structured log line
+    logger.log(level, json.dumps({"event": "snapshot", "ts": round(time.time(), 3), **snapshot()}, default=str))
+
+
+def write_metrics(path):
+    # Prometheus text, or JSON when the path ends in .json
+    with open(path, "w") as f:
+        if path.endswith(".json"):
+            json.dump(snapshot(), f, indent=1)
+        else:
+            f.write(to_prometheus())
+
+
+def diagnostics_panel(container=None):
+    # Stage, request and cache tables plus a Prometheus download, for an expander or the sidebar
+    import pandas as pd
+    import streamlit as st
+
+    container = container or st
+    snap = snapshot()
+    if snap["stages"]:
+        stages = pd.DataFrame(snap["stages"]).T.sort_values("seconds", ascending=False)
+        container.markdown("**Stages**")
+        container.dataframe(stages, use_container_width=True)
+    if snap["requests"]:
+        container.markdown("**External requests**")
+        container.dataframe(pd.DataFrame(snap["requests"]).T, use_container_width=True)
+    if snap["caches"]:
+        container.markdown("**Caches**")
+        container.dataframe(pd.DataFrame(snap["caches"]).T, use_container_width=True)
+    if snap["counters"]:
+        container.markdown("**Counters**")
+        container.json(snap["counters"])
+    container.download_button("Download metrics (Prometheus)", to_prometheus(snap), file_name="metrics.prom",
+                              mime="text/plain")
@@ -0,0 +1,158 @@
+import functools
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import register_cache
+
+
+# Memoization for the planning pipeline. Each stage's results are keyed on a content hash of
+# its arguments (the data itself, not object identity), so a changed table always misses and an
+# unchanged one always hits. Cached values are frozen: containers become tuples/read-only
+# mappings, arrays read-only, and DataFrames are handed out as copies, so no caller or session
+# can change what another one gets back.
+
+
+def _hash_into(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(b"frame")
+        h.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(b"series")
+        h.update(repr((value.name, str(value.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(b"array")
+        h.update(repr((value.shape, str(value.dtype))).encode())
+        h.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else pickle.dumps(value))
+    elif isinstance(value, (dict, MappingProxyType)):
+        h.update(b"dict")
+        for key in sorted(value, key=repr):
+            _hash_into(h, key)
+            _hash_into(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(b"list" if isinstance(value, list) else b"tuple")
+        h.update(str(len(value)).encode())
+        for item in value:
+            _hash_into(h, item)
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, np.generic)):
+        h.update(repr((type(value).__name__, value)).encode())
+    elif hasattr(value, "__dict__"):
+        # Plain objects such as DistanceMatrix hash by their attributes
+        h.update(type(value).__qualname__.encode())
+        _hash_into(h, vars(value))
+    else:
+        h.update(pickle.dumps(value))
+
+
+def content_hash(*args, **kwargs):
+    h = hashlib.blake2b(digest_size=20)
+    _hash_into(h, args)
+    _hash_into(h, kwargs)
+    return h.hexdigest()
+
+
+def freeze(value):
+    # Immutable version of a stage result
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.setflags(write=False)
+        return value
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _hand_out(value):
+    # DataFrames cannot be made read-only, so every caller gets its own copy
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_hand_out(item) for item in value)
+    if isinstance(value, MappingProxyType) and any(isinstance(v, pd.DataFrame) for v in value.values()):
+        return MappingProxyType({key: _hand_out(item) for key, item in value.items()})
+    return value
+
+
+class StageCache:
+    def __init__(self, max_items=16):
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_stages = {}
+
+
+def memoize(stage, max_items=16):
+    """
+    Cache a pipeline stage on the content of its arguments.
+    Args:
+        stage (str): name used for invalidation and metrics
+        max_items (int): results kept for this stage, least recently used dropped first
+    """
+    cache = _stages.setdefault(stage, StageCache(max_items))
+    register_cache(f"memo.{stage}", lambda: (cache.hits, cache.misses))
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = content_hash(func.__qualname__, args, kwargs)
+            found, value = cache.get(key)
+            if not found:
+                value = freeze(func(*args, **kwargs))
+                cache.put(key, value)
+            return _hand_out(value)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def invalidate(stage=None):
+    # Drop the cached results of one stage, or of every stage
+    for name, cache in _stages.items():
+        if stage is None or name == stage:
+            cache.clear()
+
+
+def stats():
+    # stage -> {'hits', 'misses', 'hit_rate', 'entries'}
+    return {name: {"hits": c.hits, "misses": c.misses, "hit_rate": c.hit_rate(), "entries": len(c._entries)}
+            for name, c in _stages.items()}
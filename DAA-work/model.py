@@ -0,0 +1,168 @@
+import numpy as np
+
+
+# Core data model for routing: every NGO, destination and volunteer is a dense integer node ID
+# into one set of NumPy arrays (struct of arrays), and routes are short lists of Stop objects
+# that point back into them. Node IDs follow the distance matrix order (NGOs, destinations,
+# volunteers, each in frame row order), so a node ID is also its DistanceMatrix index.
+
+KINDS = ("NGO", "Destination", "Volunteer")
+NGO, DESTINATION, VOLUNTEER = range(len(KINDS))
+
+
+class Entities:
+    __slots__ = ("ids", "names", "lat", "lon", "qty", "kind", "counts", "offsets")
+
+    def __init__(self, ids, names, lat, lon, qty, kind):
+        self.ids = np.asarray(ids, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.qty = np.asarray(qty, dtype=np.float64)  # supply for NGOs, need for destinations, 0 for volunteers
+        self.kind = np.asarray(kind, dtype=np.int8)
+
+        self.counts = tuple(int(n) for n in np.bincount(self.kind, minlength=len(KINDS)))
+        self.offsets = tuple(int(n) for n in np.concatenate([[0], np.cumsum(self.counts)[:-1]]))
+
+    @classmethod
+    def from_frames(cls, ngos, destinations, volunteers=None, need_column="Adjusted Need"):
+        """
+        Entities of the three tables, in distance matrix order.
+        Args:
+            ngos (pd.DataFrame): NGOs with Latitude/Longitude/Food_Availability
+            destinations (pd.DataFrame): Destinations with Latitude/Longitude and a need column
+            volunteers (pd.DataFrame): Volunteers with Latitude/Longitude (optional)
+            need_column (str): destination quantity; 'People in Need' when the column is missing
+        """
+        if destinations is not None and need_column not in destinations.columns:
+            need_column = "People in Need"
+        parts = [(NGO, ngos, "Food_Availability"), (DESTINATION, destinations, need_column),
+                 (VOLUNTEER, volunteers, None)]
+
+        columns = {"ids": [], "names": [], "lat": [], "lon": [], "qty": [], "kind": []}
+        for kind, frame, qty in parts:
+            n = 0 if frame is None else len(frame)
+            if not n:
+                continue
+            columns["ids"].append(frame["ID"].to_numpy(dtype=object) if "ID" in frame.columns
+                                  else np.arange(n).astype(object))
+            columns["names"].append(frame["Name"].to_numpy(dtype=object) if "Name" in frame.columns
+                                    else np.full(n, None, dtype=object))
+            columns["lat"].append(frame["Latitude"].to_numpy(dtype=np.float64))
+            columns["lon"].append(frame["Longitude"].to_numpy(dtype=np.float64))
+            columns["qty"].append(frame[qty].to_numpy(dtype=np.float64) if qty else np.zeros(n))
+            columns["kind"].append(np.full(n, kind, dtype=np.int8))
+
+        empty = {"ids": object, "names": object, "lat": np.float64, "lon": np.float64, "qty": np.float64,
+                 "kind": np.int8}
+        return cls(**{key: np.concatenate(chunks) if chunks else np.empty(0, dtype=empty[key])
+                      for key, chunks in columns.items()})
+
+    def __len__(self):
+        return len(self.kind)
+
+    def node(self, kind, pos):
+        # Node ID of the pos-th (positional) entity of a kind, e.g. node("Destination", 3)
+        return self.offsets[KINDS.index(kind)] + pos
+
+    def nodes(self, kind):
+        k = KINDS.index(kind)
+        return np.arange(self.offsets[k], self.offsets[k] + self.counts[k])
+
+    def coords(self, nodes=None):
+        # (n, 2) array of (lat, lon), for all nodes or the given ones
+        if nodes is None:
+            return np.column_stack([self.lat, self.lon])
+        nodes = np.asarray(nodes, dtype=np.intp)
+        return np.column_stack([self.lat[nodes], self.lon[nodes]])
+
+    def stop(self, node):
+        node = int(node)
+        return Stop(node, KINDS[self.kind[node]], self.ids[node], self.names[node], float(self.lat[node]),
+                    float(self.lon[node]), float(self.qty[node]))
+
+    def route(self, name, nodes, km=None):
+        return Route(name, [self.stop(node) for node in nodes], km)
+
+    @property
+    def nbytes(self):
+        # Array memory; ids and names only count their pointers
+        return sum(getattr(self, key).nbytes for key in ("ids", "names", "lat", "lon", "qty", "kind"))
+
+
+class _Frozen:
+    # Stops and routes are shared through the planning memo cache, so they cannot be changed
+    # after construction; build a new one instead
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # Rebuild through __init__ when pickled (e.g. for worker processes)
+        return _rebuild, (type(self), tuple(object.__getattribute__(self, key) for key in self.__slots__))
+
+
+def _rebuild(cls, values):
+    value = object.__new__(cls)
+    for key, item in zip(cls.__slots__, values):
+        object.__setattr__(value, key, item)
+    return value
+
+
+class Stop(_Frozen):
+    __slots__ = ("node", "kind", "id", "name", "lat", "lon", "qty")
+
+    def __init__(self, node, kind, entity_id, name, lat, lon, qty):
+        init = object.__setattr__
+        init(self, "node", node)  # -1 when the stop does not come from an Entities table
+        init(self, "kind", kind)
+        init(self, "id", entity_id)
+        init(self, "name", name)
+        init(self, "lat", lat)
+        init(self, "lon", lon)
+        init(self, "qty", qty)
+
+    @property
+    def point(self):
+        return (self.lat, self.lon)
+
+    def __repr__(self):
+        return f"Stop({self.kind} {self.id!r} @ {self.lat:.5f},{self.lon:.5f})"
+
+
+class Route(_Frozen):
+    """
+    A volunteer's stops in visiting order, start first. Iterating, indexing and len() work on
+    the (lat, lon) points, so a Route can stand in wherever a list of points was used.
+    """
+
+    __slots__ = ("name", "stops", "km")
+
+    def __init__(self, name, stops, km=None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "stops", tuple(stops))
+        object.__setattr__(self, "km", km)
+
+    def __len__(self):
+        return len(self.stops)
+
+    def __iter__(self):
+        return (stop.point for stop in self.stops)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [stop.point for stop in self.stops[i]]
+        return self.stops[i].point
+
+    def points(self):
+        return [stop.point for stop in self.stops]
+
+    def nodes(self):
+        return np.array([stop.node for stop in self.stops], dtype=np.intp)
+
+    def __repr__(self):
+        return f"Route({self.name!r}, {len(self.stops)} stops)"
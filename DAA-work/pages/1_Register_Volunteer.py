@@ -1,20 +1,15 @@
 import streamlit as st
 import pandas as pd
-from geopy.geocoders import Nominatim
-import os
+from geocoding import get_geocoding_service
+from utils import add_volunteer
 
 st.set_page_config(page_title="Register Volunteer", layout="centered")
 st.title("🙋🏻‍♂️ Register Volunteer")
 
-# File path for volunteers data
-volunteer_file = "volunteers.csv"
+def get_geocoder():
+    # One geocoder, rate limiter and address cache per server process, shared with bulk import
+    return get_geocoding_service()
 
-# Check if the file exists
-if os.path.exists(volunteer_file):
-    df_volunteers = pd.read_csv(volunteer_file)
-else:
-    # Initialize dataframe with proper column names
-    df_volunteers = pd.DataFrame(columns=["ID", "Name", "Phone", "Address", "Latitude", "Longitude", "Vehicle Type"])
 
 # Form to register a new volunteer
 with st.form("volunteer_form"):
@@ -26,38 +21,15 @@ with st.form("volunteer_form"):
     submitted = st.form_submit_button("Register Volunteer")
 
     if submitted:
-        # Geocode address to lat/long
-        geolocator = Nominatim(user_agent="food-distribution-app")
-        location = geolocator.geocode(address)
+        # Geocode address to lat/long (cached; only new addresses reach the geocoder)
+        location = get_geocoder().geocode(address)
 
         if location:
-            lat, lon = location.latitude, location.longitude
+            lat, lon = location
             
-            # Generate a unique ID for the new volunteer
-            volunteer_id = len(df_volunteers) + 1  # Auto-increment ID based on current row count
-
-            # Create a DataFrame with the new volunteer's data
-            new_data = pd.DataFrame({
-                "ID": [volunteer_id],
-                "Name": [name],
-                "Phone": [phone],
-                "Address": [address],
-                "Latitude": [lat],
-                "Longitude": [lon],
-                "Vehicle Type": [vehicle]
-            })
-
-            # Remove original Latitude and Longitude columns before concatenating
-            df_volunteers = df_volunteers.loc[:, ~df_volunteers.columns.isin(["Latitude", "Longitude"])]
-
-            # Rename Latitude and Longitude to lat and lon
-            new_data = new_data.rename(columns={"Latitude": "lat", "Longitude": "lon"})
-
-            # Append the new volunteer data to the existing dataframe
-            df_volunteers = pd.concat([df_volunteers, new_data], ignore_index=True)
-
-            # Save the updated data to CSV
-            df_volunteers.to_csv(volunteer_file, index=False)
+            # The database assigns the next ID; the row is appended without rewriting the others
+            add_volunteer(None, name, lat, lon, phone=phone, address=address, vehicle_type=vehicle)
+            new_data = pd.DataFrame({"lat": [lat], "lon": [lon]})
 
             st.success(f"✅ Volunteer '{name}' registered successfully!")
             st.map(new_data[["lat", "lon"]])  # Use the 'lat' and 'lon' columns for map
@@ -1,14 +1,21 @@
 import streamlit as st
-import pandas as pd
+import html
 import folium
 from streamlit_folium import st_folium
 from utils import add_destination
+from snapshot import entity_table
+from rendering import CLUSTER_ABOVE, add_entity_markers
 
 st.set_page_config(page_title="Register Destination", page_icon="🏚")
 
 st.markdown("<h2>📍 Register a Destination</h2>", unsafe_allow_html=True)
 st.markdown("Click on the map to select the location, then fill in the details below.")
 
+
+def destination_popup(row):
+    return f"{html.escape(str(row['Name']))}<br>People in Need: {row['People in Need']}"
+
+
 # --- 1. Show clickable map for location selection ---
 default_location = [12.8405, 80.1535]  # Center map around VIT Chennai
 click_map = folium.Map(location=default_location, zoom_start=13)
@@ -42,23 +49,25 @@ st.markdown("---")
 st.header("📍 Registered Destinations Map")
 
 try:
-    df = pd.read_excel("destinations.xlsx")
+    df = entity_table("destinations")
 
     if not df.empty:
-        map_view = folium.Map(location=[df["Latitude"].mean(), df["Longitude"].mean()], zoom_start=12)
+        # Built once per session; later registrations are added to the map in the browser
+        base = st.session_state.get("destination_map")
+        if base is None or not base["rows"] <= len(df) <= base["rows"] + CLUSTER_ABOVE:
+            map_view = folium.Map(location=[df["Latitude"].mean(), df["Longitude"].mean()], zoom_start=12)
+            # Plain markers for a few rows, one client-side marker cluster for many
+            add_entity_markers(map_view, df, popup=destination_popup, color="purple", icon="home")
+            base = st.session_state["destination_map"] = {"map": map_view, "rows": len(df)}
 
-        for _, row in df.iterrows():
-            folium.Marker(
-                location=[row["Latitude"], row["Longitude"]],
-                popup=f"{row['Name']}<br>People in Need: {row['People in Need']}",
-                icon=folium.Icon(color="purple", icon="home", prefix="fa")
-            ).add_to(map_view)
+        new_destinations = folium.FeatureGroup(name="New destinations")
+        add_entity_markers(new_destinations, df.iloc[base["rows"]:], popup=destination_popup,
+                           color="purple", icon="home")
 
-        st_folium(map_view, width=700, height=500)
+        st_folium(base["map"], feature_group_to_add=new_destinations, key="destination_map_view",
+                  width=700, height=500)
     else:
         st.info("No destinations registered yet.")
 
-except FileNotFoundError:
-    st.warning("Destination data file not found.")
 except Exception as e:
     st.error(f"Error displaying registered destinations: {e}")
@@ -1,15 +1,21 @@
 import streamlit as st
-import pandas as pd
+import html
 import folium
 from streamlit_folium import st_folium
 from utils import add_ngo  # assumes your logic is in utils.py
-import os
+from snapshot import entity_table
+from rendering import CLUSTER_ABOVE, add_entity_markers
 
 st.set_page_config(page_title="Register NGO", layout="wide")
 st.title("🏢 Register an NGO")
 
 st.markdown("Click on the map to select the NGO's location. Then fill out the form below to register.")
 
+
+def ngo_popup(row):
+    return f"{html.escape(str(row['Name']))}<br>Food: {row['Food_Availability']}"
+
+
 # --- 1. Interactive Clickable Map ---
 default_location = [12.8405, 80.1535]  # Centered around VIT Chennai by default
 map_obj = folium.Map(location=default_location, zoom_start=13)
@@ -41,30 +47,26 @@ with st.form("ngo_form"):
             st.success(f"🎉 NGO '{name}' registered at ({latitude:.6f}, {longitude:.6f})!")
 
 # --- 3. Display NGOs on Updated Map ---
-file_path = 'ngos.xlsx'
-if os.path.exists(file_path):
-    df = pd.read_excel(file_path)
+df = entity_table("ngos")
 
-    if not df.empty:
-        st.subheader("📍 Registered NGOs on Map")
-
-        # Center on the newly added NGO if submitted, else average center
-        if submitted and latitude and longitude:
-            map_center = [latitude, longitude]
-        else:
-            map_center = [df['Latitude'].mean(), df['Longitude'].mean()]
+if not df.empty:
+    st.subheader("📍 Registered NGOs on Map")
 
-        m = folium.Map(location=map_center, zoom_start=13)
+    # The full map is built once per session; NGOs registered since then go in a small layer
+    # that st_folium adds to the map already in the browser instead of sending it again
+    base = st.session_state.get("ngo_map")
+    if base is None or not base["rows"] <= len(df) <= base["rows"] + CLUSTER_ABOVE:
+        m = folium.Map(location=[df['Latitude'].mean(), df['Longitude'].mean()], zoom_start=13)
+        # Plain markers for a few rows, one client-side marker cluster for many
+        add_entity_markers(m, df, popup=ngo_popup, color='green', icon='cutlery')
+        base = st.session_state["ngo_map"] = {"map": m, "rows": len(df)}
 
-        for _, row in df.iterrows():
-            folium.Marker(
-                location=[row['Latitude'], row['Longitude']],
-                popup=f"{row['Name']}<br>Food: {row['Food_Availability']}",
-                icon=folium.Icon(color='green', icon='cutlery', prefix='fa')
-            ).add_to(m)
+    new_ngos = folium.FeatureGroup(name="New NGOs")
+    add_entity_markers(new_ngos, df.iloc[base["rows"]:], popup=ngo_popup, color='green', icon='cutlery')
 
-        st_folium(m, width=700, height=500)
-    else:
-        st.info("No NGOs registered yet.")
+    # Center on the newly added NGO if submitted
+    center = [latitude, longitude] if submitted and latitude and longitude else None
+    st_folium(base["map"], feature_group_to_add=new_ngos, center=center, key="ngo_map_view",
+              width=700, height=500)
 else:
-    st.info("No NGO data file found.")
+    st.info("No NGOs registered yet.")
@@ -0,0 +1,41 @@
+import streamlit as st
+from bulk_import import FORMATS, bulk_import, detect_format
+from geocoding import get_geocoding_service
+
+st.set_page_config(page_title="Bulk Import", layout="centered")
+st.title("📦 Bulk Import")
+
+st.markdown("Upload a CSV, Parquet or GeoJSON file of NGOs, destinations or volunteers. "
+            "Rows are checked, duplicates (by ID) skipped, and everything valid is added in chunks.")
+
+tables = {"NGOs": "ngos", "Destinations": "destinations", "Volunteers": "volunteers"}
+
+with st.form("bulk_import_form"):
+    kind = st.selectbox("Entity type", list(tables))
+    uploaded = st.file_uploader("Data file", type=["csv", "parquet", "geojson", "json"])
+    geocode = st.checkbox("Geocode addresses of rows without coordinates")
+    chunksize = st.number_input("Rows per chunk", min_value=100, max_value=100000, value=5000, step=100)
+
+    submitted = st.form_submit_button("Import")
+
+    if submitted:
+        if uploaded is None:
+            st.error("❌ Please choose a file to import.")
+        else:
+            status = st.empty()
+            try:
+                result = bulk_import(
+                    uploaded, tables[kind], detect_format(uploaded.name), int(chunksize),
+                    progress=lambda s: status.info(f"⏳ {s['rows']} rows read, {s['inserted']} imported "
+                                                   f"({s['rows_per_sec']:.0f} rows/s)"),
+                    geocoder=get_geocoding_service() if geocode else None
+                )
+            except ValueError as e:
+                st.error(f"❌ {e} (supported: {', '.join(FORMATS)})")
+            else:
+                status.empty()
+                st.success(f"✅ {result['inserted']} of {result['rows']} rows imported in {result['seconds']:.2f}s "
+                           f"({result['rows_per_sec']:.0f} rows/s)")
+                if result["invalid"] or result["duplicates"]:
+                    st.warning(f"⚠ {result['invalid']} invalid and {result['duplicates']} duplicate rows were skipped.")
+                    st.dataframe(result["rejected"].head(200))
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from instrumentation import count, timed
+from route_optimizer import get_solver
+
+
+# Per-volunteer route optimization across a process pool. The distance matrix is placed in
+# shared memory once; each task only ships the volunteer's stop indices. Workers are spawned,
+# not forked, since the Streamlit server that calls this runs many threads.
+
+_worker_arrays = {}
+_worker_handles = []
+
+
+class SharedArray:
+    # A NumPy array copied into a named shared-memory block, attachable from other processes
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self.shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)[...] = array
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(specs):
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _worker_handles.append(shm)  # keep the mapping alive for the worker's lifetime
+        _worker_arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _run_job(km, job, solver, time_budget, max_moves):
+    return get_solver(solver)(km, job["start"], job["pickups"], job["drops"],
+                              pickup_loads=job.get("pickup_loads"), drop_loads=job.get("drop_loads"),
+                              capacity=job.get("capacity"), time_budget=time_budget, max_moves=max_moves)
+
+
+def _solve(job, solver, time_budget, max_moves):
+    return _run_job(_worker_arrays["km"], job, solver, time_budget, max_moves)
+
+
+@timed("solve_routes")
+def solve_routes(km, jobs, solver="local-search", workers=1, time_budget=None, max_moves=None):
+    """
+    Solve one route per job, serially or across a process pool.
+    Args:
+        km (np.ndarray): distance matrix shared by every job
+        jobs (list): dicts with start, pickups, drops and optional pickup_loads, drop_loads, capacity
+        solver (str): route_optimizer solver name
+        workers (int): process count; 1 runs in-process, None uses every core
+        time_budget (float): seconds per route; leave None (and use max_moves) when results
+            must be identical whatever the worker count
+        max_moves (int): improving moves per route
+    Returns the route (matrix indices) for each job, in job order.
+    """
+    workers = workers or os.cpu_count() or 1
+    count("routes_solved", len(jobs))
+    if workers <= 1 or len(jobs) <= 1:
+        return [_run_job(km, job, solver, time_budget, max_moves) for job in jobs]
+
+    shared = {"km": SharedArray(np.asarray(km, dtype=np.float64))}
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_attach, initargs=({key: arr.spec for key, arr in shared.items()},)) as pool:
+            # map keeps job order, so the output never depends on which worker finishes first
+            return list(pool.map(_solve, jobs, [solver] * len(jobs), [time_budget] * len(jobs),
+                                 [max_moves] * len(jobs)))
+    finally:
+        for arr in shared.values():
+            arr.release()
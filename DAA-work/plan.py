@@ -0,0 +1,9 @@
+import sys
+
+from planning import main
+
+
+# Command line entry point, e.g. python plan.py --ngos ngos.csv --destinations dest.csv
+#   --volunteers volunteers.csv --out routes.parquet  (any file left out is read from the database)
+if __name__ == "__main__":
+    sys.exit(main())
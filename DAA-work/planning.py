@@ -0,0 +1,361 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from memo import memoize
+
+
+# Route planning without Streamlit: load entities, balance supply against need, cluster stops
+# per volunteer and build routes. The route page and the command line both call into this
+# module. Heavy dependencies (sklearn, osmnx, the process pool) are imported inside the stages
+# that need them, so importing it is cheap.
+
+MODES = ("clusters", "capacitated")
+ALLOCATIONS = ("flow", "proportional")
+
+
+class PlanningError(Exception):
+    pass
+
+
+def check_entities(volunteers, ngos, destinations):
+    # Raises PlanningError naming the first table that is empty
+    for label, frame in (("volunteers", volunteers), ("NGOs", ngos), ("destinations", destinations)):
+        if frame.empty:
+            raise PlanningError(f"No {label} registered yet.")
+    return volunteers, ngos, destinations
+
+
+def load_entities(repo=None):
+    """
+    (volunteers, ngos, destinations) from the entity database, as shared read-only snapshots.
+    Raises PlanningError naming the first table that is empty.
+    """
+    from snapshot import entity_table
+
+    return check_entities(entity_table("volunteers", repo), entity_table("ngos", repo),
+                          entity_table("destinations", repo))
+
+
+def read_entities(path, table):
+    """
+    A CSV, Parquet or GeoJSON file with the same columns (or aliases) bulk import accepts,
+    checked the same way. Raises PlanningError when a required column is missing; rows that
+    fail the checks are left out with a warning.
+    """
+    from bulk_import import REQUIRED, detect_format, iter_chunks, validate_chunk
+
+    try:
+        chunks = list(iter_chunks(path, detect_format(path)))
+    except pd.errors.EmptyDataError:
+        chunks = []  # zero-byte CSV
+    # A file without rows (e.g. a GeoJSON with no features) reads as an empty table
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=REQUIRED[table])
+    valid, rejected = validate_chunk(frame, table)
+    if len(rejected) and not len(valid) and rejected["Reason"].str.startswith("missing column").all():
+        raise PlanningError(f"{path}: {rejected['Reason'].iloc[0]}")
+    if len(rejected):
+        print(f"⚠ {path}: skipped {len(rejected)} invalid row(s), e.g. {rejected['Reason'].iloc[0]}", file=sys.stderr)
+
+    valid = valid.reset_index(drop=True)
+    ids = [str(i) for i in range(1, len(valid) + 1)]
+    valid["ID"] = valid["ID"].where(valid["ID"].notna(), pd.Series(ids)) if "ID" in valid.columns else ids
+    return valid
+
+
+# 🔄 Normalize needs vs availability
+@timed("normalize_food_supply")
+@memoize("normalize")
+def normalize_food_supply(ngos, destinations, allocation="flow"):
+    """
+    Units each destination can actually receive, as an 'Adjusted Need' column.
+    Args:
+        allocation (str): 'flow' ships supply to destinations at minimum distance with a fair share
+            for everyone (allocation.py); 'proportional' scales all needs by one global factor
+    Returns (ngos, destinations, flows); flows holds the NGO -> destination shipments of the
+    'flow' allocation (None for 'proportional'), for clustering and fleet to follow.
+    """
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"Unknown allocation '{allocation}', expected one of {ALLOCATIONS}")
+    if allocation == "flow" and len(ngos) and len(destinations):
+        from allocation import allocate_supply
+
+        result = allocate_supply(ngos, destinations)
+        return ngos, destinations.assign(**{"Adjusted Need": result["allocated"].astype(int)}), result["flows"]
+
+    total_need = destinations["People in Need"].sum()
+    total_supply = ngos["Food_Availability"].sum()
+
+    if total_supply < total_need:
+        scale_factor = total_supply / total_need
+        destinations = destinations.assign(
+            **{"Adjusted Need": (destinations["People in Need"] * scale_factor).round().astype(int)})
+    else:
+        destinations = destinations.assign(**{"Adjusted Need": destinations["People in Need"]})
+
+    return ngos, destinations, None
+
+
+# 👥 Group NGOs and destinations among volunteers (KMeans, MiniBatchKMeans for large inputs)
+@timed("assign_locations")
+@memoize("clusters")
+def assign_locations(volunteers, ngos, destinations, method="auto", flows=None):
+    from clustering import assign_clusters
+
+    volunteers = volunteers.assign(Volunteer_ID=np.arange(len(volunteers)))
+
+    # Labels and rebalancing work on arrays; the frames are only reordered once at the end
+    ngo_labels, dest_labels, ngo_order, dest_order = assign_clusters(len(volunteers), ngos, destinations, method,
+                                                                     flows=flows)
+
+    ngos_final = ngos.assign(Volunteer_ID=ngo_labels).iloc[np.lexsort((ngo_order, ngo_labels))]
+    destinations_final = destinations.assign(Volunteer_ID=dest_labels).iloc[np.lexsort((dest_order, dest_labels))]
+
+    return volunteers, ngos_final.reset_index(drop=True), destinations_final.reset_index(drop=True)
+
+
+def greedy_order(start, locations):
+    # Nearest-neighbour visiting order from start, as positions into locations
+    from geodistance import one_to_many
+
+    points = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+    remaining = list(range(len(points)))
+    order = []
+
+    current = start
+    while remaining:
+        # One vectorized distance pass per step instead of a geodesic call per candidate
+        order.append(remaining.pop(int(np.argmin(one_to_many(current, points[remaining])))))
+        current = points[order[-1]]
+
+    return order
+
+
+# 📍 Helper to compute route using greedy TSP approximation
+@timed("compute_greedy_route")
+@memoize("greedy_route")
+def compute_greedy_route(start, locations):
+    locations = list(locations)
+    return [start] + [locations[i] for i in greedy_order(start, locations)]
+
+
+@timed("build_volunteer_routes")
+@memoize("routes")
+def build_volunteer_routes(volunteers, ngos, destinations, _matrix=None, solver="local-search", time_budget=1.0,
+                           max_moves=None, workers=1):
+    """
+    One route per volunteer over the NGOs and destinations of their cluster (Volunteer_ID).
+    Returns (routes, route_km): volunteer name -> model.Route, and -> km.
+    """
+    from geodistance import path_length_km
+    from model import Entities
+
+    # Node IDs are the distance matrix indices: both list NGOs, destinations, then volunteers
+    entities = Entities.from_frames(ngos, destinations, volunteers)
+    ngo_nodes, dest_nodes = entities.nodes("NGO"), entities.nodes("Destination")
+    ngo_owner = ngos["Volunteer_ID"].to_numpy()
+    dest_owner = destinations["Volunteer_ID"].to_numpy()
+    names = volunteers["Name"] if "Name" in volunteers.columns else [f"Volunteer_{i}" for i in volunteers.index]
+
+    routes = {}
+    route_km = {}
+    jobs = {}
+
+    for pos, (vol_id, name) in enumerate(zip(volunteers.index, names)):
+        pickups = ngo_nodes[ngo_owner == vol_id]
+        drops = dest_nodes[dest_owner == vol_id]
+
+        # Skip volunteers with no deliveries
+        if not len(pickups) and not len(drops):
+            continue
+
+        start = entities.node("Volunteer", pos)
+
+        if _matrix is not None:
+            # Collected here, solved below on node IDs (serially or across the process pool)
+            jobs[name] = {
+                "start": start,
+                "pickups": pickups.tolist(),
+                "drops": drops.tolist(),
+                "pickup_loads": entities.qty[pickups],
+                "drop_loads": entities.qty[drops],
+            }
+            continue
+
+        start_point = entities.coords([start])[0]
+        pickups = pickups[greedy_order(start_point, entities.coords(pickups))]
+        last_point = entities.coords(pickups[-1:])[0] if len(pickups) else start_point
+        drops = drops[greedy_order(last_point, entities.coords(drops))]
+
+        nodes = [start, *pickups, *drops]
+        routes[name] = entities.route(name, nodes, path_length_km(entities.coords(nodes)))
+        route_km[name] = routes[name].km
+
+    if jobs:
+        from parallel_routes import solve_routes
+
+        # Greedy warm start, then local search within the per-route budget
+        solved = solve_routes(_matrix.km, list(jobs.values()), solver=solver, workers=workers,
+                              time_budget=time_budget, max_moves=max_moves)
+        for name, route_idx in zip(jobs, solved):
+            routes[name] = entities.route(name, route_idx, _matrix.route_length(route_idx))
+            route_km[name] = routes[name].km
+
+    return routes, route_km
+
+
+@timed("build_capacitated_routes")
+def build_capacitated_routes(volunteers, ngos, destinations, _matrix, makespan_weight=1.0, flows=None):
+    from fleet import DEFAULT_VEHICLE, assign_capacitated
+    from model import Entities
+
+    routes, route_km, trips = {}, {}, {}
+    plans = assign_capacitated(_matrix, ngos, destinations, volunteers, makespan_weight=makespan_weight,
+                               flows=flows)
+    entities = Entities.from_frames(ngos, destinations, volunteers)
+    names = volunteers["Name"] if "Name" in volunteers.columns else [f"Volunteer_{i}" for i in volunteers.index]
+    vehicles = volunteers["Vehicle Type"] if "Vehicle Type" in volunteers.columns else [None] * len(volunteers)
+
+    for name, vehicle, plan in zip(names, vehicles, plans):
+        if plan["trips"] == 0:
+            continue
+        routes[name] = entities.route(name, plan["route"], plan["km"])
+        route_km[name] = plan["km"]
+        trips[name] = {
+            "vehicle": vehicle if vehicle is not None else DEFAULT_VEHICLE,
+            "trips": plan["trips"],
+            "units": round(sum(load for load in plan["loads"] if load > 0)),
+        }
+
+    return routes, route_km, trips
+
+
+@timed("plan_routes")
+def plan_routes(volunteers, ngos, destinations, mode="clusters", method="auto", solver="local-search",
+                time_budget=1.0, max_moves=None, workers=1, makespan_weight=1.0, allocation="flow",
+                normalized=False, flows=None):
+    """
+    Run the whole pipeline.
+    Args:
+        mode (str): 'clusters' (one KMeans cluster per volunteer) or 'capacitated' (vehicle-sized trips)
+        method, solver, time_budget, max_moves, workers: clustering and route search settings
+        makespan_weight (float): capacitated mode only
+        allocation (str): how supply is split among destinations, see normalize_food_supply
+        normalized (bool): ngos/destinations already come from normalize_food_supply, with flows as
+            it returned them, so the allocation is not solved a second time
+    Returns a dict with the (possibly reordered) entity frames, routes, route_km and trips
+    (trips is None in cluster mode).
+    """
+    from distance_matrix import build_distance_matrix
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+    if not normalized:
+        ngos, destinations, flows = normalize_food_supply(ngos, destinations, allocation)
+
+    trips = None
+    if mode == "capacitated":
+        # Trips sized to each volunteer's vehicle, NGO supply split across as many trips as needed
+        matrix = build_distance_matrix(ngos, destinations, volunteers)
+        routes, route_km, trips = build_capacitated_routes(volunteers, ngos, destinations, _matrix=matrix,
+                                                           makespan_weight=makespan_weight, flows=flows)
+    else:
+        # With flows, destinations go to the volunteer collecting from the NGO that supplies them
+        volunteers, ngos, destinations = assign_locations(volunteers, ngos, destinations, method, flows)
+
+        # One distance matrix feeds routing and the route report
+        matrix = build_distance_matrix(ngos, destinations, volunteers)
+        routes, route_km = build_volunteer_routes(volunteers, ngos, destinations, _matrix=matrix,
+                                                  solver=solver, time_budget=time_budget,
+                                                  max_moves=max_moves, workers=workers)
+
+    return {
+        "volunteers": volunteers,
+        "ngos": ngos,
+        "destinations": destinations,
+        "routes": routes,
+        "route_km": route_km,
+        "trips": trips,
+    }
+
+
+def routes_frame(plan):
+    # One row per stop: volunteer, stop number, kind, name, units, latitude, longitude, route km
+    rows = []
+    for volunteer, route in plan["routes"].items():
+        for seq, stop in enumerate(route.stops):
+            if stop.kind == "Volunteer":
+                kind, name, units = "Start" if seq == 0 else "Transit", None, None
+            else:
+                kind, name, units = stop.kind, stop.name, stop.qty
+            rows.append((volunteer, seq, kind, name, units, stop.lat, stop.lon, plan["route_km"][volunteer]))
+    return pd.DataFrame(rows, columns=["Volunteer", "Stop", "Kind", "Name", "Units", "Latitude", "Longitude",
+                                       "Route km"])
+
+
+def write_routes(frame, path):
+    if path.endswith((".parquet", ".pq")):
+        frame.to_parquet(path, index=False)
+    elif path.endswith(".json"):
+        frame.to_json(path, orient="records", indent=1)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan food distribution routes without the web app")
+    parser.add_argument("--ngos", help="NGO file (csv, parquet or geojson); the database is used if omitted")
+    parser.add_argument("--destinations", help="destination file; the database is used if omitted")
+    parser.add_argument("--volunteers", help="volunteer file; the database is used if omitted")
+    parser.add_argument("--db", help="entity database (defaults to FOOD_DB_PATH)")
+    parser.add_argument("--out", default="routes.parquet", help="routes file: .parquet, .csv or .json")
+    parser.add_argument("--mode", choices=MODES, default="clusters")
+    parser.add_argument("--allocation", choices=ALLOCATIONS, default="flow")
+    parser.add_argument("--method", choices=("auto", "kmeans", "minibatch"), default="auto")
+    parser.add_argument("--solver", default="local-search")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="seconds of local search per route")
+    parser.add_argument("--max-moves", type=int, help="improving moves per route instead of a time budget")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--makespan-weight", type=float, default=1.0)
+    parser.add_argument("--metrics", help="write stage timings and cache metrics here (Prometheus text, or .json)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tables = {}
+    try:
+        # Files where given, the database only for the tables left out
+        for table in ("ngos", "destinations", "volunteers"):
+            path = getattr(args, table)
+            if path:
+                tables[table] = read_entities(path, table)
+            else:
+                from snapshot import entity_table
+                from storage import get_repository
+                tables[table] = entity_table(table, get_repository(args.db) if args.db else None)
+        check_entities(tables["volunteers"], tables["ngos"], tables["destinations"])
+    except PlanningError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    plan = plan_routes(tables["volunteers"], tables["ngos"], tables["destinations"], mode=args.mode,
+                       method=args.method, solver=args.solver,
+                       time_budget=None if args.max_moves else args.time_budget,
+                       max_moves=args.max_moves, workers=args.workers, makespan_weight=args.makespan_weight,
+                       allocation=args.allocation)
+    frame = routes_frame(plan)
+    write_routes(frame, args.out)
+    if args.metrics:
+        from instrumentation import write_metrics
+        write_metrics(args.metrics)
+    print(f"✅ {len(plan['routes'])} routes, {len(frame)} stops, {sum(plan['route_km'].values()):.1f} km "
+          f"written to {os.path.abspath(args.out)} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
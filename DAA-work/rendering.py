@@ -0,0 +1,137 @@
+import html
+
+import folium
+import numpy as np
+from folium.plugins import FastMarkerCluster
+
+
+# Map rendering that stays light with thousands of stops: stop details come straight from the
+# model.Route stops, all stops of all routes go out as one GeoJSON layer, registered
+# entities as one clustered marker layer, and route lines are simplified before embedding.
+
+STOP_COLORS = {"NGO": "green", "Destination": "red", "Point": "blue"}
+CLUSTER_ABOVE = 200  # pages switch from plain markers to a marker cluster above this many rows
+
+
+def route_stop_features(routes):
+    # One GeoJSON point per stop of each model.Route with the popup text and colour as properties
+    features = []
+    for vol_id, route in routes.items():
+        for i, stop in enumerate(route.stops):
+            kind, name = stop.kind, stop.name
+            if kind == "NGO":
+                text = f"Volunteer {vol_id} Pickup: {stop.qty:g} units"
+            elif kind == "Destination":
+                text = f"Volunteer {vol_id} Drop-off: {stop.qty:g} units"
+            else:
+                kind, name = "Point", None
+                text = f"Volunteer {vol_id} {'Start' if i == 0 else 'End' if i == len(route) - 1 else 'Transit'} Point"
+            if name:
+                text += f" ({name})"
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [stop.lon, stop.lat]},
+                "properties": {"popup": html.escape(text), "color": STOP_COLORS[kind]},
+            })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def add_stop_layer(m, features, name="Stops"):
+    folium.GeoJson(
+        features,
+        name=name,
+        marker=folium.CircleMarker(radius=5, fill=True, fill_opacity=0.9, weight=1),
+        style_function=lambda f: {"color": f["properties"]["color"], "fillColor": f["properties"]["color"]},
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+    ).add_to(m)
+
+
+def meters_per_pixel(zoom, lat=0.0):
+    # Web Mercator ground resolution
+    return 156543.03392 * np.cos(np.radians(lat)) / 2 ** zoom
+
+
+def simplify_line(coords, tolerance):
+    """
+    Douglas-Peucker simplification of a [[x, y], ...] line; endpoints are always kept.
+    Args:
+        tolerance (float): maximum allowed deviation, in the units of coords
+    """
+    points = np.asarray(coords, dtype=np.float64)
+    if len(points) < 3 or tolerance <= 0:
+        return [list(p) for p in points]
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        inner = points[first + 1:last] - start
+        length = np.hypot(*segment)
+        if length == 0:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        worst = int(np.argmax(dist))
+        if dist[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep].tolist()
+
+
+def simplify_geometry(geometry, zoom, pixels=1.0):
+    """
+    Simplify a GeoJSON LineString/MultiLineString (lon, lat) to what is visible at zoom:
+    vertices closer than `pixels` screen pixels to the simplified line are dropped.
+    """
+    if geometry.get("type") not in ("LineString", "MultiLineString"):
+        return geometry
+    lines = geometry["coordinates"] if geometry["type"] == "MultiLineString" else [geometry["coordinates"]]
+    if not lines or not lines[0]:
+        return geometry
+    lat = float(np.mean([p[1] for p in lines[0]]))
+    tolerance = pixels * meters_per_pixel(zoom, lat) / 111320.0  # degrees
+    simplified = [simplify_line(line, tolerance) for line in lines]
+    if geometry["type"] == "LineString":
+        return {"type": "LineString", "coordinates": simplified[0]}
+    return {"type": "MultiLineString", "coordinates": simplified}
+
+
+def add_entity_markers(m, frame, popup, color, icon, name=None):
+    """
+    Markers for registered entities: plain markers for small tables, one clustered
+    layer (markers built client side from a compact array) for large ones.
+    Args:
+        popup (callable): row dict -> popup HTML
+    """
+    rows = frame.to_dict("records")
+    if len(rows) <= CLUSTER_ABOVE:
+        group = folium.FeatureGroup(name=name) if name else m
+        for row in rows:
+            folium.Marker(
+                location=[row["Latitude"], row["Longitude"]],
+                popup=popup(row),
+                icon=folium.Icon(color=color, icon=icon, prefix="fa")
+            ).add_to(group)
+        if name:
+            group.add_to(m)
+        return group
+
+    data = [[float(row["Latitude"]), float(row["Longitude"]), popup(row)] for row in rows]
+    callback = f"""
+        function (row) {{
+            var icon = L.AwesomeMarkers.icon({{icon: "{icon}", prefix: "fa", markerColor: "{color}"}});
+            var marker = L.marker(new L.LatLng(row[0], row[1]), {{icon: icon}});
+            marker.bindPopup(row[2]);
+            return marker;
+        }};
+    """
+    cluster = FastMarkerCluster(data, callback=callback, name=name)
+    cluster.add_to(m)
+    return cluster
@@ -0,0 +1,127 @@
+import os
+import time
+
+import networkx as nx
+import osmnx as ox
+
+import config
+from instrumentation import record_request, record_stage
+
+
+# Road networks are cached per service region, first in memory and then on disk as GraphML
+CACHE_DIR = os.path.join(config.CACHE_DIR, "osm")
+
+# Regions are snapped outward to this grid (degrees) so nearby requests share one download
+GRID = 0.05
+# Padding around the requested points so routes can leave the convex hull a little
+MARGIN = 0.05
+
+_graphs = {}          # region key -> road graph
+_nearest = {}         # (region key, lat, lon) -> OSM node id
+timings = []          # one record per region load, newest last
+
+
+def region_for(coords, margin=MARGIN, grid=GRID):
+    # Bounding box (west, south, east, north) covering every (lat, lon) in coords
+    lats = [c[0] for c in coords]
+    lons = [c[1] for c in coords]
+
+    def snap_down(x):
+        return round((x // grid) * grid, 4)
+
+    def snap_up(x):
+        return round(-((-x) // grid) * grid, 4)
+
+    return (
+        snap_down(min(lons) - margin),
+        snap_down(min(lats) - margin),
+        snap_up(max(lons) + margin),
+        snap_up(max(lats) + margin),
+    )
+
+
+def _region_key(bbox, network_type):
+    west, south, east, north = bbox
+    return f"{network_type}_{west:.4f}_{south:.4f}_{east:.4f}_{north:.4f}"
+
+
+def _parse_key(key):
+    network_type, *bounds = key.rsplit("_", 4)
+    return network_type, tuple(float(b) for b in bounds)
+
+
+def _covers(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _find_cached(bbox, network_type, cache_dir):
+    # Any in-memory region that contains the bbox can be reused as-is
+    for key in _graphs:
+        nt, bounds = _parse_key(key)
+        if nt == network_type and _covers(bounds, bbox):
+            return key, None
+
+    if os.path.isdir(cache_dir):
+        for filename in sorted(os.listdir(cache_dir)):
+            if not filename.endswith(".graphml"):
+                continue
+            key = filename[:-len(".graphml")]
+            try:
+                nt, bounds = _parse_key(key)
+            except ValueError:
+                continue
+            if nt == network_type and _covers(bounds, bbox):
+                return key, os.path.join(cache_dir, filename)
+
+    return None, None
+
+
+def get_road_network(coords, network_type="drive", cache_dir=None):
+    """
+    Return (region_key, graph) for a road network covering all coords.
+    Args:
+        coords (list): (lat, lon) pairs that must lie inside the region
+        network_type (str): osmnx network type, e.g. 'drive'
+        cache_dir (str): directory holding the GraphML disk cache, CACHE_DIR by default
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    bbox = region_for(coords)
+    key, path = _find_cached(bbox, network_type, cache_dir)
+
+    start = time.perf_counter()
+    if key is not None and path is None:
+        return key, _graphs[key]
+
+    if key is not None:
+        G = ox.load_graphml(path)
+        source = "disk"
+    else:
+        key = _region_key(bbox, network_type)
+        G = ox.graph_from_bbox(bbox, network_type=network_type)
+        record_request("osm_download", time.perf_counter() - start)
+        os.makedirs(cache_dir, exist_ok=True)
+        ox.save_graphml(G, os.path.join(cache_dir, key + ".graphml"))
+        source = "download"
+
+    _graphs[key] = G
+    elapsed = time.perf_counter() - start
+    timings.append({"region": key, "source": source, "seconds": elapsed})
+    record_stage(f"road_network.load_{source}", elapsed)
+    print(f"🗺 Road network {key} loaded from {source} in {elapsed:.2f}s")
+    return key, G
+
+
+def nearest_nodes(region_key, G, coords):
+    # OSM node for every (lat, lon), each location resolved only once per region
+    missing = [c for c in dict.fromkeys(coords) if (region_key, c[0], c[1]) not in _nearest]
+    if missing:
+        nodes = ox.distance.nearest_nodes(G, X=[c[1] for c in missing], Y=[c[0] for c in missing])
+        for c, node in zip(missing, nodes):
+            _nearest[(region_key, c[0], c[1])] = int(node)
+
+    return [_nearest[(region_key, c[0], c[1])] for c in coords]
+
+
+def clear_memory_cache():
+    _graphs.clear()
+    _nearest.clear()
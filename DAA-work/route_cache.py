@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import CACHE_DIR
+from instrumentation import register_cache
+
+
+# Content-addressed cache for driving directions: the key is a hash of the ordered stop list,
+# the profile and the backend, the value holds geometry, distance (m) and duration (s).
+# An in-memory LRU sits in front of a directory of JSON files with a TTL and a size cap.
+
+PRECISION = 6  # decimal places of each stop that take part in the key
+
+
+def route_key(stops, profile="driving-car", backend="ors"):
+    # stops are [lon, lat] pairs in visiting order
+    payload = json.dumps({
+        "stops": [[round(float(x), PRECISION), round(float(y), PRECISION)] for x, y in stops],
+        "profile": profile,
+        "backend": backend,
+    }, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RouteCache:
+    def __init__(self, cache_dir=None, memory_items=512, ttl_seconds=7 * 24 * 3600, max_disk_bytes=200 * 1024 ** 2):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, "routes")
+        self.memory_items = memory_items
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                               if entry.name.endswith(".json"))
+        register_cache("route", lambda: (self.stats["memory_hits"] + self.stats["disk_hits"], self.stats["misses"]))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _remember(self, key, value, stored_at=None):
+        self._memory[key] = (value, stored_at or time.time())
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                value, stored_at = self._memory[key]
+                if time.time() - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+                if time.time() - entry["stored_at"] > self.ttl_seconds:
+                    self._disk_bytes -= os.path.getsize(path)
+                    os.remove(path)
+                    self.stats["expired"] += 1
+                else:
+                    self._remember(key, entry["value"], stored_at=entry["stored_at"])
+                    os.utime(path)  # mtime tracks last use for size eviction
+                    self.stats["disk_hits"] += 1
+                    return entry["value"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        stored_at = time.time()
+        data = json.dumps({"stored_at": stored_at, "value": value}, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, value, stored_at)
+            path = self._path(key)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._disk_bytes += len(data) - old_size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used files until the directory is back under 90% of the cap
+        entries = sorted((e for e in os.scandir(self.cache_dir) if e.name.endswith(".json")),
+                         key=lambda e: e.stat().st_mtime)
+        for entry in entries:
+            if self._disk_bytes <= 0.9 * self.max_disk_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+            self.stats["evicted"] += 1
+
+    def get_or_compute(self, stops, compute, profile="driving-car", backend="ors"):
+        """
+        Cached {'geometry', 'distance', 'duration'} for the ordered stops.
+        compute() is only called on a miss and must return a directions FeatureCollection.
+        """
+        key = route_key(stops, profile, backend)
+        value = self.get(key)
+        if value is None:
+            feature = compute()["features"][0]
+            summary = feature.get("properties", {}).get("summary", {})
+            value = {
+                "geometry": feature["geometry"],
+                "distance": summary.get("distance"),
+                "duration": summary.get("duration"),
+            }
+            self.put(key, value)
+        return value
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
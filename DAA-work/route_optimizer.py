@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+
+from distance_matrix import greedy_order
+
+
+# Route optimization over a precomputed distance matrix.
+# A route is a list of matrix indices: route[0] is the volunteer's start and never moves,
+# the route is open (it ends at the last stop). Each stop may carry a load delta
+# (+ pickup, - drop); a route is feasible while the carried load stays within [0, capacity].
+
+EPS = 1e-9
+
+
+def route_cost(km, route):
+    route = np.asarray(route)
+    if len(route) < 2:
+        return 0.0
+    return float(km[route[:-1], route[1:]].sum())
+
+
+class _LocalSearch:
+    def __init__(self, km, route, loads, capacity, deadline, max_moves):
+        self.nodes = np.asarray(route)
+        n = len(route)
+
+        # Local matrix over the route's nodes plus a dummy end node at zero distance from
+        # everything, which turns the open path into a closed one for move evaluation
+        self.D = np.zeros((n + 1, n + 1))
+        self.D[:n, :n] = km[np.ix_(self.nodes, self.nodes)]
+
+        self.loads = np.zeros(n + 1) if loads is None else np.append(np.asarray(loads, dtype=np.float64), 0.0)
+        self.capacity = capacity
+        self.deadline = deadline
+        self.moves_left = max_moves
+        self.r = np.arange(n + 1)  # positions -> local node, dummy end last
+
+    def cost(self, r):
+        return float(self.D[r[:-1], r[1:]].sum())
+
+    def feasible(self, r):
+        carried = np.cumsum(self.loads[r])
+        if carried.min() < -EPS:
+            return False
+        return self.capacity is None or carried.max() <= self.capacity + EPS
+
+    def out_of_time(self):
+        if self.moves_left is not None and self.moves_left <= 0:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def _accept(self, candidate):
+        if self.feasible(candidate) and self.cost(candidate) < self.cost(self.r) - EPS:
+            self.r = candidate
+            if self.moves_left is not None:
+                self.moves_left -= 1
+            return True
+        return False
+
+    def two_opt(self):
+        r, D = self.r, self.D
+        last = len(r) - 1  # dummy end position
+        for i in range(1, last - 1):
+            j = np.arange(i + 1, last)
+            delta = D[r[i - 1], r[j]] + D[r[i], r[j + 1]] - D[r[i - 1], r[i]] - D[r[j], r[j + 1]]
+            for k in np.argsort(delta):
+                if delta[k] >= -EPS:
+                    break
+                jj = j[k]
+                candidate = np.concatenate([r[:i], r[i:jj + 1][::-1], r[jj + 1:]])
+                if self._accept(candidate):
+                    return True
+            if self.out_of_time():
+                return False
+        return False
+
+    def or_opt(self, max_segment=3):
+        D = self.D
+        for length in range(1, max_segment + 1):
+            r = self.r
+            last = len(r) - 1
+            for i in range(1, last - length + 1):
+                seg = r[i:i + length]
+                prev, nxt = r[i - 1], r[i + length]
+                removed = D[prev, seg[0]] + D[seg[-1], nxt] - D[prev, nxt]
+
+                rest = np.concatenate([r[:i], r[i + length:]])
+                u, v = rest[:-1], rest[1:]
+                for reverse in (False, True):
+                    s0, s1 = (seg[-1], seg[0]) if reverse else (seg[0], seg[-1])
+                    delta = D[u, s0] + D[s1, v] - D[u, v] - removed
+                    for k in np.argsort(delta):
+                        if delta[k] >= -EPS:
+                            break
+                        piece = seg[::-1] if reverse else seg
+                        candidate = np.concatenate([rest[:k + 1], piece, rest[k + 1:]])
+                        if self._accept(candidate):
+                            return True
+                if self.out_of_time():
+                    return False
+        return False
+
+    def run(self):
+        while not self.out_of_time():
+            if not (self.two_opt() or self.or_opt()):
+                break
+        return [int(self.nodes[p]) for p in self.r[:-1]]
+
+
+def improve_route(km, route, loads=None, capacity=None, time_budget=1.0, max_moves=None):
+    """
+    2-opt and Or-opt local search on an open route, keeping route[0] fixed.
+    Args:
+        km (np.ndarray): distance matrix indexed by the values in route
+        route (list): matrix indices, start first; must already satisfy the load constraints
+        loads (list): load delta per route position (+ pickup, - drop), None for no precedence
+        capacity (float): maximum carried load, None for unlimited
+        time_budget (float): seconds to spend before returning the best route so far, None for no limit
+        max_moves (int): stop after this many improving moves; unlike time_budget the result
+            does not depend on machine load, None for no limit
+    """
+    if len(route) < 3:
+        return list(route)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    search = _LocalSearch(km, route, loads, capacity, deadline, max_moves)
+    if not search.feasible(search.r):
+        return list(route)
+    return search.run()
+
+
+def greedy_route(km, start, pickups, drops, pickup_loads=None, drop_loads=None, capacity=None, time_budget=None,
+                 max_moves=None):
+    # Nearest-neighbour pickups, then nearest-neighbour drops: the original behaviour
+    pickup_order = greedy_order(km, start, pickups)
+    drop_order = greedy_order(km, pickup_order[-1] if pickup_order else start, drops)
+    return [start] + pickup_order + drop_order
+
+
+def local_search_route(km, start, pickups, drops, pickup_loads=None, drop_loads=None, capacity=None, time_budget=1.0,
+                       max_moves=None):
+    # Greedy warm start improved by 2-opt/Or-opt
+    route = greedy_route(km, start, pickups, drops)
+
+    if pickup_loads is None or drop_loads is None:
+        # Without quantities keep every pickup ahead of every drop: optimize the two legs separately
+        half = time_budget / 2 if time_budget is not None else None
+        pickup_leg = improve_route(km, route[:len(pickups) + 1], time_budget=half, max_moves=max_moves)
+        drop_leg = improve_route(km, pickup_leg[-1:] + route[len(pickups) + 1:], time_budget=half, max_moves=max_moves)
+        return pickup_leg + drop_leg[1:]
+
+    # With quantities a drop may move ahead of later pickups once enough food is carried.
+    # Drops are scaled to what the pickups can cover so the warm start is always feasible.
+    pickup_loads = np.asarray(pickup_loads, dtype=np.float64)
+    drop_loads = np.asarray(drop_loads, dtype=np.float64)
+    supply, need = pickup_loads.sum(), drop_loads.sum()
+    if need > supply:
+        drop_loads = drop_loads * (supply / need)
+
+    load_of = {start: 0.0}
+    load_of.update(zip(pickups, pickup_loads))
+    load_of.update(zip(drops, -drop_loads))
+    loads = [load_of[node] for node in route]
+    return improve_route(km, route, loads, capacity, time_budget, max_moves)
+
+
+# Pluggable route solvers, all sharing the signature of local_search_route
+SOLVERS = {
+    "greedy": greedy_route,
+    "local-search": local_search_route,
+}
+
+
+def register_solver(name, solver):
+    SOLVERS[name] = solver
+
+
+def get_solver(name):
+    try:
+        return SOLVERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown route solver '{name}', expected one of {sorted(SOLVERS)}")
@@ -0,0 +1,130 @@
+import time
+
+from config import ORS_API_KEY, ROUTING_BACKEND
+from instrumentation import record_request, timed
+
+
+# Driving directions backends. Each takes [lon, lat] coordinates like the ORS client and returns
+# a GeoJSON FeatureCollection whose first feature holds the LineString geometry and a summary
+# with distance (m) and duration (s).
+
+DEFAULT_SPEED_KMH = 30.0
+
+
+def _feature_collection(line, distance_m, duration_s):
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": line},
+            "properties": {"summary": {"distance": distance_m, "duration": duration_s}},
+        }],
+    }
+
+
+class OrsBackend:
+    name = "ors"
+    needs_snapping = True
+
+    def __init__(self, ors_key=ORS_API_KEY):
+        import openrouteservice
+        self.client = openrouteservice.Client(key=ors_key)
+
+    def directions(self, coords, profile="driving-car", region=None):
+        start = time.perf_counter()
+        try:
+            result = self.client.directions(coords, profile=profile, format="geojson")
+        except Exception:
+            record_request("ors_directions", time.perf_counter() - start, ok=False)
+            raise
+        record_request("ors_directions", time.perf_counter() - start)
+        return result
+
+
+class LocalBackend:
+    """
+    In-process shortest paths over the cached OSM road network from road_network.py.
+    Points are matched to their nearest road node, so no separate snapping step is needed.
+    """
+
+    name = "local"
+    needs_snapping = False
+
+    def __init__(self, network_type="drive", speed_kmh=DEFAULT_SPEED_KMH):
+        self.network_type = network_type
+        self.speed_kmh = speed_kmh
+
+    def _ensure_travel_times(self, G):
+        # Impute per-edge speeds and travel times once per graph; fall back to a flat speed
+        if G.graph.get("travel_times_added"):
+            return
+        try:
+            import osmnx as ox
+            ox.add_edge_speeds(G)
+            ox.add_edge_travel_times(G)
+        except Exception:
+            pass
+        G.graph["travel_times_added"] = True
+
+    def _edge(self, G, u, v):
+        # Shortest of the parallel edges between u and v
+        return min(G[u][v].values(), key=lambda data: data.get("length", 0.0))
+
+    def _edge_seconds(self, data):
+        if "travel_time" in data:
+            return float(data["travel_time"])
+        return data.get("length", 0.0) / 1000 / self.speed_kmh * 3600
+
+    def _edge_line(self, G, u, v, data):
+        if "geometry" not in data:
+            return [[G.nodes[u]["x"], G.nodes[u]["y"]], [G.nodes[v]["x"], G.nodes[v]["y"]]]
+        line = [list(c) for c in data["geometry"].coords]
+        start = (G.nodes[u]["x"], G.nodes[u]["y"])
+        if (line[0][0] - start[0]) ** 2 + (line[0][1] - start[1]) ** 2 > \
+                (line[-1][0] - start[0]) ** 2 + (line[-1][1] - start[1]) ** 2:
+            line.reverse()
+        return line
+
+    @timed("local_directions")
+    def directions(self, coords, profile="driving-car", region=None):
+        """
+        Args:
+            region (list): (lat, lon) points of every route being drawn; the road network is loaded
+                for all of them, so later routes reuse it instead of each downloading its own area
+        """
+        # networkx/osmnx are only loaded once local routing is actually used
+        import networkx as nx
+        from road_network import get_road_network, nearest_nodes
+
+        latlon = [(lat, lon) for lon, lat in coords]
+        region_key, G = get_road_network(latlon + list(region or []), network_type=self.network_type)
+        nodes = nearest_nodes(region_key, G, latlon)
+        self._ensure_travel_times(G)
+
+        line = [[G.nodes[nodes[0]]["x"], G.nodes[nodes[0]]["y"]]]
+        distance_m = duration_s = 0.0
+        for a, b in zip(nodes, nodes[1:]):
+            if a == b:
+                continue
+            path = nx.shortest_path(G, a, b, weight="length")
+            for u, v in zip(path, path[1:]):
+                data = self._edge(G, u, v)
+                distance_m += data.get("length", 0.0)
+                duration_s += self._edge_seconds(data)
+                line.extend(self._edge_line(G, u, v, data)[1:])
+
+        return _feature_collection(line, distance_m, duration_s)
+
+
+BACKENDS = {
+    "ors": OrsBackend,
+    "local": LocalBackend,
+}
+
+
+def get_backend(name=None):
+    # Backend named in config (ROUTING_BACKEND) unless one is given explicitly
+    name = name or ROUTING_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown routing backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
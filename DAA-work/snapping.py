@@ -0,0 +1,132 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import CACHE_DIR, ORS_BASE_URL, ORS_MAX_WORKERS, ORS_TIMEOUT
+from instrumentation import record_request, register_cache
+
+
+# Snaps coordinates onto the road network through the ORS /v2/nearest endpoint.
+# Lookups are deduplicated, run concurrently over one pooled session, and remembered
+# in memory and in a small SQLite file so reruns never snap the same point twice.
+
+PRECISION = 6  # decimal places used for cache keys (~0.1 m)
+
+
+def _key(lat, lon):
+    return round(float(lat), PRECISION), round(float(lon), PRECISION)
+
+
+class SnapService:
+    def __init__(self, ors_key, base_url=ORS_BASE_URL, cache_path=None, timeout=ORS_TIMEOUT,
+                 max_workers=ORS_MAX_WORKERS, max_retries=5, jitter_attempts=5, base_radius=350):
+        self.url = base_url.rstrip("/") + "/v2/nearest"
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.jitter_attempts = jitter_attempts
+        self.base_radius = base_radius
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": ors_key, "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.cache_path = cache_path or os.path.join(CACHE_DIR, "snaps.sqlite")
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "failures": 0}
+        self._load_cache()
+        register_cache("snap", lambda: (self.stats["hits"], self.stats["misses"]))
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        conn = sqlite3.connect(self.cache_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS snaps (lat REAL, lon REAL, snapped_lat REAL, snapped_lon REAL, "
+                     "PRIMARY KEY (lat, lon))")
+        return conn
+
+    def _load_cache(self):
+        with closing(self._connect()) as conn:
+            for lat, lon, s_lat, s_lon in conn.execute("SELECT lat, lon, snapped_lat, snapped_lon FROM snaps"):
+                self._memory[(lat, lon)] = (s_lat, s_lon)
+
+    def _try_snap(self, lat, lon, radius):
+        body = {"coordinates": [[lon, lat]], "radius": radius}
+        with self._lock:
+            self.stats["requests"] += 1
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+            response.raise_for_status()
+            coords = response.json()["features"][0]["geometry"]["coordinates"]
+            record_request("ors_nearest", time.perf_counter() - start)
+            return coords[1], coords[0]
+        except (requests.RequestException, KeyError, IndexError, TypeError, ValueError):
+            record_request("ors_nearest", time.perf_counter() - start, ok=False)
+            return None
+
+    def _snap_uncached(self, lat, lon):
+        # Same search as before: expanding radius, then 1 km, then jittered retries
+        for i in range(self.max_retries):
+            snapped = self._try_snap(lat, lon, self.base_radius * (i + 1))
+            if snapped:
+                return snapped
+
+        snapped = self._try_snap(lat, lon, 1000)
+        if snapped:
+            return snapped
+
+        for _ in range(self.jitter_attempts):
+            snapped = self._try_snap(lat + random.uniform(-0.0005, 0.0005),
+                                     lon + random.uniform(-0.0005, 0.0005), self.base_radius)
+            if snapped:
+                return snapped
+        return None
+
+    def snap_many(self, points):
+        """
+        Snap every (lat, lon) in points.
+        Returns (snapped points in the same order, points that could not be snapped); those
+        come back unchanged. One service is shared by all sessions, so nothing per call is kept on it.
+        """
+        keys = [_key(lat, lon) for lat, lon in points]
+        missing = [k for k in dict.fromkeys(keys) if k not in self._memory]
+        with self._lock:
+            self.stats["hits"] += len(keys) - len(missing)
+            self.stats["misses"] += len(missing)
+
+        failed = []
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                results = list(pool.map(lambda k: self._snap_uncached(*k), missing))
+
+            found = []
+            for k, snapped in zip(missing, results):
+                if snapped is None:
+                    # Failures are not cached: the next run tries again
+                    failed.append(k)
+                else:
+                    self._memory[k] = snapped
+                    found.append((k[0], k[1], snapped[0], snapped[1]))
+
+            with self._lock:
+                self.stats["failures"] += len(failed)
+            if found:
+                with closing(self._connect()) as conn, conn:
+                    conn.executemany("INSERT OR REPLACE INTO snaps VALUES (?, ?, ?, ?)", found)
+
+        return [self._memory.get(k, (lat, lon)) for k, (lat, lon) in zip(keys, points)], failed
+
+    def snap(self, lat, lon):
+        # Snapped (lat, lon), or None when the point could not be snapped
+        snapped, failed = self.snap_many([(lat, lon)])
+        return None if failed else snapped[0]
@@ -0,0 +1,69 @@
+import threading
+
+import pandas as pd
+
+from instrumentation import register_cache
+
+
+# Shared in-process snapshots of the entity tables. A table is read from the database only when
+# its write counter (EntityRepository.version) has moved since the last read, so a Streamlit rerun
+# with unchanged data costs one small meta query instead of a full table load.
+# Snapshots are shared between sessions, so callers get read-only frames: the column arrays
+# cannot be written in place, and derived frames (assign, filters, copy) are ordinary ones.
+
+_lock = threading.Lock()
+_snapshots = {}  # (database path, table) -> (version, frame)
+_stats = {"hits": 0, "misses": 0}
+
+
+def read_only(frame):
+    # Same data with every column in its own non-writeable array
+    columns = {}
+    for col in frame.columns:
+        values = frame[col].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+def entity_table(table, repo=None):
+    """
+    Read-only frame of an entity table, re-read only after a write to it.
+    Args:
+        table (str): 'ngos', 'destinations' or 'volunteers'
+        repo (EntityRepository): defaults to the shared repository
+    """
+    if repo is None:
+        from storage import get_repository
+        repo = get_repository()
+    key = (repo.path, table)
+
+    # Version first: a write landing before the load only makes the snapshot newer than its version
+    version = repo.version(table)
+    with _lock:
+        cached = _snapshots.get(key)
+        if cached is not None and cached[0] == version:
+            _stats["hits"] += 1
+            return cached[1].copy(deep=False)
+
+    frame = read_only(repo.load(table))
+    with _lock:
+        _snapshots[key] = (version, frame)
+        _stats["misses"] += 1
+    # Shallow copy: adding a column to it leaves the shared snapshot alone
+    return frame.copy(deep=False)
+
+
+def invalidate(table=None):
+    # Drop snapshots, e.g. after writing to the database file outside storage.py
+    with _lock:
+        for key in [k for k in _snapshots if table is None or k[1] == table]:
+            del _snapshots[key]
+
+
+def stats():
+    with _lock:
+        return dict(_stats, tables=len(_snapshots))
+
+
+register_cache("snapshot", lambda: (_stats["hits"], _stats["misses"]))
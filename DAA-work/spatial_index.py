@@ -0,0 +1,126 @@
+import numpy as np
+
+from geodistance import EARTH_RADIUS_KM, many_to_many, one_to_many
+
+
+class SpatialIndex:
+    """
+    Haversine BallTree over (lat, lon) points with incremental inserts.
+    New points land in a small brute-force buffer that is searched alongside the tree,
+    and the tree is rebuilt once the buffer reaches rebuild_every points.
+    """
+
+    def __init__(self, points=None, ids=None, rebuild_every=256, leaf_size=40):
+        self.rebuild_every = rebuild_every
+        self.leaf_size = leaf_size
+        self._tree = None
+        self._tree_ids = np.empty(0, dtype=object)
+        self._tree_points = np.empty((0, 2))
+        self._pending = []
+        self._pending_ids = []
+
+        if points is not None and len(points):
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            ids = np.arange(len(points)) if ids is None else ids
+            self._build(points, np.asarray(list(ids), dtype=object))
+
+    def __len__(self):
+        return len(self._tree_ids) + len(self._pending)
+
+    @property
+    def ids(self):
+        return np.concatenate([self._tree_ids, np.asarray(self._pending_ids, dtype=object)])
+
+    @property
+    def points(self):
+        return np.vstack([self._tree_points, np.asarray(self._pending, dtype=np.float64).reshape(-1, 2)])
+
+    def _build(self, points, ids):
+        from sklearn.neighbors import BallTree
+
+        self._tree = BallTree(np.radians(points), metric="haversine", leaf_size=self.leaf_size)
+        self._tree_ids = ids
+        self._tree_points = points
+        self._pending, self._pending_ids = [], []
+
+    def add(self, entity_id, lat, lon):
+        self._pending.append((float(lat), float(lon)))
+        self._pending_ids.append(entity_id)
+        if len(self._pending) >= self.rebuild_every:
+            self._build(self.points, self.ids)
+
+    def query(self, points, k=1):
+        """
+        k nearest entities for each query point.
+        Args:
+            points (array-like): (n, 2) array of (lat, lon) in degrees
+            k (int): number of neighbours, capped at len(self)
+        Returns (distances_km, ids), both shaped (n, k) and sorted nearest first.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty((len(points), 0)), np.empty((len(points), 0), dtype=object)
+
+        dist_parts, id_parts = [], []
+        if self._tree is not None:
+            dist, pos = self._tree.query(np.radians(points), k=min(k, len(self._tree_ids)))
+            dist_parts.append(dist * EARTH_RADIUS_KM)
+            id_parts.append(self._tree_ids[pos])
+        if self._pending:
+            pending = np.asarray(self._pending)
+            dist_parts.append(many_to_many(points, pending))
+            id_parts.append(np.tile(np.asarray(self._pending_ids, dtype=object), (len(points), 1)))
+
+        dist = np.hstack(dist_parts)
+        ids = np.hstack(id_parts)
+        order = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(dist, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def nearest(self, points):
+        dist, ids = self.query(points, k=1)
+        return dist[:, 0], ids[:, 0]
+
+    def query_radius(self, points, radius_km):
+        # List of (ids, distances_km) per query point, nearest first
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        results = []
+        for point in points:
+            ids, dist = [], []
+            if self._tree is not None:
+                pos, d = self._tree.query_radius(np.radians(point[None, :]), r=radius_km / EARTH_RADIUS_KM,
+                                                 return_distance=True, sort_results=True)
+                ids.extend(self._tree_ids[pos[0]])
+                dist.extend(d[0] * EARTH_RADIUS_KM)
+            if self._pending:
+                d = one_to_many(point, self._pending)
+                hits = np.nonzero(d <= radius_km)[0]
+                ids.extend(self._pending_ids[h] for h in hits)
+                dist.extend(d[hits])
+            order = np.argsort(dist, kind="stable")
+            results.append((np.asarray(ids, dtype=object)[order], np.asarray(dist, dtype=np.float64)[order]))
+        return results
+
+
+# Shared per-process indexes keyed by kind ('NGO', 'Destination', 'Volunteer', ...).
+# Entities are identified by their row label in the data file they were loaded from.
+_indexes = {}
+
+
+def get_index(kind, df=None):
+    # Index for one entity kind, rebuilt from df when it is missing or out of step with it
+    index = _indexes.get(kind)
+    if df is not None:
+        points = df[["Latitude", "Longitude"]].to_numpy(dtype=np.float64)
+        ids = list(df.index)
+        if index is None or len(index) != len(df) or list(index.ids) != ids or not np.array_equal(index.points, points):
+            index = SpatialIndex(points, ids)
+            _indexes[kind] = index
+    return index
+
+
+def register(kind, row_label, lat, lon):
+    # Keep an already built index in step with a newly registered entity
+    index = _indexes.get(kind)
+    if index is not None:
+        index.add(row_label, lat, lon)
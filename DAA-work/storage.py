@@ -0,0 +1,211 @@
+import argparse
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from config import BASE_DIR, DB_PATH
+
+
+# SQLite storage for NGOs, destinations and volunteers. The database runs in WAL mode so
+# concurrent Streamlit sessions can append without rewriting (or overwriting) each other's rows.
+# Frames come back with the same column names the xlsx/csv files used.
+
+# table -> [(sql column, DataFrame column, sql type)]
+SCHEMAS = {
+    "ngos": [
+        ("id", "ID", "TEXT"),
+        ("name", "Name", "TEXT"),
+        ("latitude", "Latitude", "REAL NOT NULL"),
+        ("longitude", "Longitude", "REAL NOT NULL"),
+        ("food_availability", "Food_Availability", "REAL"),
+    ],
+    "destinations": [
+        ("id", "ID", "TEXT"),
+        ("name", "Name", "TEXT"),
+        ("latitude", "Latitude", "REAL NOT NULL"),
+        ("longitude", "Longitude", "REAL NOT NULL"),
+        ("people_in_need", "People in Need", "REAL"),
+    ],
+    "volunteers": [
+        ("id", "ID", "TEXT"),
+        ("name", "Name", "TEXT"),
+        ("phone", "Phone", "TEXT"),
+        ("address", "Address", "TEXT"),
+        ("latitude", "Latitude", "REAL NOT NULL"),
+        ("longitude", "Longitude", "REAL NOT NULL"),
+        ("vehicle_type", "Vehicle Type", "TEXT"),
+        ("status", "Status", "TEXT"),
+    ],
+}
+
+# Files the app used before the database, imported once on first use
+LEGACY_FILES = {
+    "ngos": os.path.join(BASE_DIR, "ngos.xlsx"),
+    "destinations": os.path.join(BASE_DIR, "destinations.xlsx"),
+    "volunteers": os.path.join(BASE_DIR, "volunteers.csv"),
+}
+
+
+class EntityRepository:
+    def __init__(self, path=DB_PATH, import_legacy=True):
+        self.path = path
+        self._local = threading.local()
+        self._create_schema()
+        if import_legacy and not self._meta("legacy_imported"):
+            import_legacy_files(self)
+
+    def connect(self):
+        # One connection per thread; Streamlit runs each session's script in its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self.connect()
+        with conn:
+            for table, columns in SCHEMAS.items():
+                cols = ", ".join(f"{sql} {sql_type}" for sql, _, sql_type in columns)
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (rowid INTEGER PRIMARY KEY, {cols})")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_lat_lon ON {table} (latitude, longitude)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_id ON {table} (id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _meta(self, key):
+        row = self.connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def _bump_version(self, conn, table):
+        # Per-table write counter, committed together with the write it counts
+        conn.execute("INSERT INTO meta VALUES (?, '1') ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                     (f"version:{table}",))
+
+    def version(self, table):
+        # Changes whenever rows are written to table through this module, from any process
+        return int(self._meta(f"version:{table}") or 0)
+
+    def _row(self, table, record):
+        return [record.get(frame_col) for _, frame_col, _ in SCHEMAS[table]]
+
+    def add(self, table, record):
+        """
+        Append one entity in its own transaction and return its rowid.
+        Args:
+            table (str): 'ngos', 'destinations' or 'volunteers'
+            record (dict): values keyed by the DataFrame column names; a missing ID becomes the rowid
+        """
+        columns = [sql for sql, _, _ in SCHEMAS[table]]
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                self._row(table, record))
+            rowid = cursor.lastrowid
+            if record.get("ID") in (None, ""):
+                conn.execute(f"UPDATE {table} SET id = ? WHERE rowid = ?", (str(rowid), rowid))
+            self._bump_version(conn, table)
+        return rowid
+
+    def _insert_many(self, conn, table, frame):
+        columns = [sql for sql, _, _ in SCHEMAS[table]]
+        rows = frame.reindex(columns=[frame_col for _, frame_col, _ in SCHEMAS[table]])
+        rows = rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None)
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+    def add_many(self, table, frame):
+        # Append every row of a DataFrame in one transaction; missing IDs become the rowid,
+        # and those generated IDs are returned
+        conn = self.connect()
+        with conn:
+            self._insert_many(conn, table, frame)
+            generated = [row[0] for row in conn.execute(
+                f"UPDATE {table} SET id = CAST(rowid AS TEXT) WHERE id IS NULL OR id = '' RETURNING id")]
+            self._bump_version(conn, table)
+        return generated
+
+    def existing_ids(self, table):
+        return {row[0] for row in self.connect().execute(f"SELECT id FROM {table} WHERE id IS NOT NULL")}
+
+    def load(self, table):
+        columns = SCHEMAS[table]
+        frame = pd.read_sql_query(
+            f"SELECT {', '.join(sql for sql, _, _ in columns)} FROM {table} ORDER BY rowid", self.connect())
+        return frame.rename(columns={sql: frame_col for sql, frame_col, _ in columns})
+
+    def count(self, table):
+        return self.connect().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def position(self, table, rowid):
+        # Row position of rowid in the frame load() returns (rowid order, gaps from deletes skipped)
+        return self.connect().execute(f"SELECT COUNT(*) FROM {table} WHERE rowid < ?", (rowid,)).fetchone()[0]
+
+
+def _read_legacy(path):
+    if not os.path.exists(path) or os.stat(path).st_size == 0:
+        return None
+    frame = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+    frame = frame.rename(columns={"lat": "Latitude", "lon": "Longitude", "Aadhar_ID": "ID"})
+    if "ID" in frame.columns:
+        frame["ID"] = frame["ID"].astype(str)
+    return frame
+
+
+def import_legacy_files(repo, files=None, force=False):
+    # One-time import of the old xlsx/csv files; returns rows imported per table
+    files = files or LEGACY_FILES
+    conn = repo.connect()
+
+    # Take the write lock before checking, so two processes starting together import only once
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if repo._meta("legacy_imported") and not force:
+            conn.rollback()
+            return {}
+
+        imported = {}
+        for table, path in files.items():
+            frame = _read_legacy(path)
+            if frame is not None and not frame.empty:
+                repo._insert_many(conn, table, frame)
+                repo._bump_version(conn, table)
+                imported[table] = len(frame)
+        repo._set_meta(conn, "legacy_imported", 1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return imported
+
+
+_repositories = {}
+
+
+def get_repository(path=DB_PATH):
+    # Shared per-process repository, created (and legacy-imported) on first use
+    if path not in _repositories:
+        _repositories[path] = EntityRepository(path)
+    return _repositories[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Food distribution entity database")
+    parser.add_argument("command", choices=["import", "stats"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--force", action="store_true", help="import again even if already imported")
+    args = parser.parse_args()
+
+    repo = EntityRepository(args.db, import_legacy=False)
+    if args.command == "import":
+        print(import_legacy_files(repo, force=args.force) or "Legacy files already imported (use --force).")
+    else:
+        for table in SCHEMAS:
+            print(f"{table}: {repo.count(table)} rows")
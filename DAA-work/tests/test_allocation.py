@@ -0,0 +1,50 @@
+# Run from DAA-work:  python -m pytest tests
+import os
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from allocation import FAIR_SHARE, allocate_supply
+from synthetic import generate
+
+
+def totals(flows, column, n):
+    return flows.groupby(column)["Units"].sum().reindex(range(n), fill_value=0).to_numpy()
+
+
+@pytest.mark.parametrize("n_entities, seed", [(300, 1), (2000, 3)])
+def test_allocation_stays_within_supply_and_need(n_entities, seed):
+    _, ngos, destinations = generate(n_entities, seed=seed)
+    supply = ngos["Food_Availability"].to_numpy(dtype=float)
+    need = destinations["People in Need"].to_numpy(dtype=float)
+
+    result = allocate_supply(ngos, destinations)
+
+    assert (result["shipped"] <= supply).all()
+    assert (result["allocated"] <= need).all()
+    # The flows add up to what is reported per NGO and per destination
+    assert np.array_equal(totals(result["flows"], "NGO_pos", len(ngos)), result["shipped"])
+    assert np.array_equal(totals(result["flows"], "Destination_pos", len(destinations)), result["allocated"])
+    assert result["unmet"] == need.sum() - result["allocated"].sum()
+
+
+def test_fair_share_comes_before_topping_up_the_nearest():
+    # One NGO sits on top of destination 0; without a fair share it would get all the food
+    ngos = pd.DataFrame({"ID": ["N0"], "Latitude": [0.0], "Longitude": [0.0], "Food_Availability": [60]})
+    destinations = pd.DataFrame({"ID": ["D0", "D1", "D2"], "Latitude": [0.0, 0.0, 0.0],
+                                 "Longitude": [0.001, 0.5, 1.0], "People in Need": [100, 50, 50]})
+
+    result = allocate_supply(ngos, destinations)
+
+    ratio = 60 / 200
+    floor = np.floor(FAIR_SHARE * ratio * destinations["People in Need"].to_numpy())
+    assert (result["allocated"] >= floor).all()
+    assert result["allocated"].sum() == 60
+    # What is left after the fair shares goes to the nearest destination
+    assert result["allocated"][0] == 60 - floor[1:].sum()
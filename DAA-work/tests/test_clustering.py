@@ -0,0 +1,40 @@
+# Run from DAA-work:  python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from clustering import assign_clusters, rebalance
+
+
+def test_rebalance_cluster_that_starts_without_destinations():
+    # Cluster 2 holds only an NGO until clusters 0 and 1 each move a destination into it;
+    # it is then short itself and must move the first of those, not some unrelated point
+    coords = np.radians([[0, 1.0], [0, -0.1], [0, 0.1], [0, 2.1], [0, 1.9], [0.1, 0]])
+    centers = np.radians([[0, 0.0], [0, 2.0], [0, 1.0]])
+    labels = np.array([2, 0, 0, 1, 1, 0])
+    supply = np.array([1.0, 0, 0, 0, 0, 0])
+    need = np.array([0, 10.0, 10, 10, 10, 10])
+    is_dest = np.arange(6) > 0
+
+    new_labels, order = rebalance(coords, labels, centers, supply, need, is_dest, passes=1)
+
+    assert new_labels.tolist() == [2, 0, 0, 2, 1, 0]
+    assert order.tolist() == [0, 8, 2, 7, 4, 5]
+    assert labels.tolist() == [2, 0, 0, 1, 1, 0]  # input left alone
+
+
+def test_destination_fed_by_two_ngos_joins_the_larger_shipper():
+    # Destination 0 sits next to NGO 0 but gets most of its food from NGO 1 across town
+    ngos = pd.DataFrame({"Latitude": [0.0, 0.0], "Longitude": [0.0, 2.0]})
+    destinations = pd.DataFrame({"Latitude": [0.0, 0.0], "Longitude": [0.1, 2.1], "Adjusted Need": [10, 5]})
+    flows = pd.DataFrame({"NGO_pos": [1, 0, 1], "Destination_pos": [0, 0, 1], "Units": [7.0, 3.0, 5.0]},
+                         index=[0, 0, 1])
+
+    ngo_labels, dest_labels, _, _ = assign_clusters(2, ngos, destinations, method="kmeans", flows=flows)
+
+    assert ngo_labels[0] != ngo_labels[1]
+    assert dest_labels.tolist() == [ngo_labels[1], ngo_labels[1]]
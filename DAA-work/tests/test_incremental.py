@@ -0,0 +1,57 @@
+# Run from DAA-work:  python -m pytest tests
+import os
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+import pandas as pd
+
+from geodistance import path_length_km
+from incremental import IncrementalPlanner, diff_entities, entity_state
+from planning import plan_routes
+from synthetic import generate
+
+# Move budget instead of time, so both plans are reproducible
+SETTINGS = dict(time_budget=None, max_moves=200, allocation="proportional")
+
+
+def served(routes):
+    return sorted((stop.kind, str(stop.id)) for route in routes.values() for stop in route.stops[1:])
+
+
+def test_patched_plan_serves_what_a_full_replan_serves():
+    volunteers, ngos, destinations = generate(80, seed=5)
+    plan = plan_routes(volunteers, ngos, destinations, **SETTINGS)
+    planner = IncrementalPlanner.from_routes(plan["volunteers"], plan["ngos"], plan["destinations"], plan["routes"])
+    known = entity_state(plan["ngos"], plan["destinations"], plan["volunteers"])
+
+    # A new destination, a changed need and a closed NGO
+    new = pd.DataFrame({"ID": ["NEW"], "Name": ["new"], "Latitude": [destinations["Latitude"].iloc[0] + 0.002],
+                        "Longitude": [destinations["Longitude"].iloc[0]], "People in Need": [20]})
+    edited = pd.concat([destinations, new], ignore_index=True)
+    edited.loc[3, "People in Need"] += 5
+    fewer_ngos = ngos.drop(ngos.index[1]).reset_index(drop=True)
+
+    deltas, _ = diff_entities(known, fewer_ngos, edited, volunteers)
+    assert sorted((d["op"], d["id"]) for d in deltas) == [
+        ("delete", ngos["ID"].iloc[1]), ("insert", "NEW"), ("update", destinations["ID"].iloc[3])]
+    reports = [planner.apply(delta) for delta in deltas]
+    assert not any(report["unplaced"] for report in reports)
+
+    patched = planner.as_routes()
+    full = plan_routes(volunteers, fewer_ngos, edited, **SETTINGS)
+    assert served(patched) == served(full["routes"])
+    # Repairing only the touched routes stays close to planning from scratch
+    assert sum(path_length_km(route) for route in patched.values()) <= 1.5 * sum(full["route_km"].values())
+
+
+def test_unchanged_tables_give_no_deltas():
+    volunteers, ngos, destinations = generate(40, seed=2)
+    known = entity_state(ngos, destinations, volunteers)
+
+    deltas, current = diff_entities(known, ngos, destinations, volunteers)
+
+    assert deltas == []
+    assert current.equals(known)
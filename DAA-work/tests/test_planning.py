@@ -0,0 +1,45 @@
+# Run from DAA-work:  python -m pytest tests
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from planning import main, read_entities
+
+
+def write_tables(folder):
+    pd.DataFrame({"Name": ["Food Bank"], "Latitude": [12.97], "Longitude": [80.22],
+                  "Food_Availability": [40]}).to_csv(folder / "ngos.csv", index=False)
+    pd.DataFrame({"Name": ["Ravi"], "Latitude": [12.95], "Longitude": [80.2]}).to_csv(
+        folder / "volunteers.csv", index=False)
+
+
+@pytest.mark.parametrize("name, content", [
+    ("destinations.geojson", json.dumps({"type": "FeatureCollection", "features": []})),
+    ("destinations.csv", "Name,Latitude,Longitude,People in Need\n"),
+    ("destinations.csv", ""),
+])
+def test_cli_reports_an_empty_destination_file(tmp_path, capsys, name, content):
+    write_tables(tmp_path)
+    (tmp_path / name).write_text(content)
+
+    code = main(["--ngos", str(tmp_path / "ngos.csv"), "--volunteers", str(tmp_path / "volunteers.csv"),
+                 "--destinations", str(tmp_path / name), "--out", str(tmp_path / "routes.csv")])
+
+    assert code == 1
+    assert "No destinations" in capsys.readouterr().err
+    assert not (tmp_path / "routes.csv").exists()
+
+
+def test_read_entities_of_an_empty_geojson_has_the_table_columns(tmp_path):
+    path = tmp_path / "ngos.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": []}))
+
+    frame = read_entities(str(path), "ngos")
+
+    assert len(frame) == 0
+    assert {"ID", "Name", "Latitude", "Longitude", "Food_Availability"} <= set(frame.columns)
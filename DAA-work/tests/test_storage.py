@@ -0,0 +1,52 @@
+# Run from DAA-work:  python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from bulk_import import bulk_import
+from snapshot import entity_table
+from storage import EntityRepository
+
+NGO = {"Name": "Food Bank", "Latitude": 12.97, "Longitude": 80.22, "Food_Availability": 40}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return EntityRepository(str(tmp_path / "entities.db"), import_legacy=False)
+
+
+def test_snapshot_is_reread_after_a_write(repo):
+    repo.add("ngos", dict(NGO, ID="N1"))
+    first = entity_table("ngos", repo)
+    assert entity_table("ngos", repo)["ID"].tolist() == ["N1"]
+
+    repo.add("ngos", dict(NGO, ID="N2"))
+
+    assert entity_table("ngos", repo)["ID"].tolist() == ["N1", "N2"]
+    assert first["ID"].tolist() == ["N1"]  # frames already handed out keep their data
+
+
+def test_snapshot_frames_are_read_only(repo):
+    repo.add("ngos", dict(NGO, ID="N1"))
+    frame = entity_table("ngos", repo)
+
+    with pytest.raises(ValueError):
+        frame["Food_Availability"].to_numpy()[0] = 0
+    frame["Extra"] = 1  # new columns only change the caller's frame
+    assert "Extra" not in entity_table("ngos", repo).columns
+
+
+def test_bulk_import_skips_ids_already_seen(repo, tmp_path):
+    path = tmp_path / "ngos.csv"
+    pd.DataFrame([dict(NGO, ID="N1"), dict(NGO, ID="N2"), dict(NGO, ID="N1")]).to_csv(path, index=False)
+
+    first = bulk_import(str(path), "ngos", "csv", repo=repo)
+    again = bulk_import(str(path), "ngos", "csv", repo=repo)
+
+    assert (first["inserted"], first["duplicates"]) == (2, 1)
+    assert (again["inserted"], again["duplicates"]) == (0, 3)
+    assert repo.load("ngos")["ID"].tolist() == ["N1", "N2"]
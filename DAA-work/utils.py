@@ -1,14 +1,15 @@
-import streamlit as st
-import pandas as pd
-import os
-import pandas as pd
-import networkx as nx
-import osmnx as ox
-from geopy.distance import geodesic
+import time
+import weakref
+import numpy as np
+from distance_matrix import build_distance_matrix
+from spatial_index import get_index, register
+from storage import get_repository
+from instrumentation import timed
+from model import Entities
 
 
 
-def add_ngo(ngo_id, name, latitude, longitude, food_availability, file_path='ngos.xlsx'):
+def add_ngo(ngo_id, name, latitude, longitude, food_availability, repo=None):
     # Create a new NGO record
     new_ngo = {
         'ID': ngo_id,
@@ -18,15 +19,10 @@ def add_ngo(ngo_id, name, latitude, longitude, food_availability, file_path='ngo
         'Food_Availability': food_availability
     }
 
-    # If file exists, append to it
-    if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        df = pd.concat([df, pd.DataFrame([new_ngo])], ignore_index=True)
-    else:
-        df = pd.DataFrame([new_ngo])
-
-    # Save back to Excel
-    df.to_excel(file_path, index=False)
+    # Single-row insert into the database instead of rewriting the whole file
+    repo = repo or get_repository()
+    rowid = repo.add('ngos', new_ngo)
+    register("NGO", repo.position('ngos', rowid), latitude, longitude)  # label in the loaded frame
     print(f"✅ NGO '{name}' added successfully.")
 
 
@@ -34,7 +30,7 @@ def add_ngo(ngo_id, name, latitude, longitude, food_availability, file_path='ngo
 
 
 
-def add_destination(dest_id, name, latitude, longitude, people_in_need, file_path='destinations.xlsx'):
+def add_destination(dest_id, name, latitude, longitude, people_in_need, repo=None):
     # Create new destination entry
     new_dest = {
         'ID': dest_id,
@@ -44,116 +40,138 @@ def add_destination(dest_id, name, latitude, longitude, people_in_need, file_pat
         'People in Need': people_in_need  # ✅ updated key
     }
 
-    # If file exists, append to it
-    if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        df = pd.concat([df, pd.DataFrame([new_dest])], ignore_index=True)
-    else:
-        df = pd.DataFrame([new_dest])
-
-    # Save back to Excel
-    df.to_excel(file_path, index=False)
+    # Single-row insert into the database instead of rewriting the whole file
+    repo = repo or get_repository()
+    rowid = repo.add('destinations', new_dest)
+    register("Destination", repo.position('destinations', rowid), latitude, longitude)
     print(f"✅ Destination '{name}' added successfully.")
 
 
 
 
 
-def add_volunteer(aadhar_id, name, latitude, longitude, status='available', file_path='volunteers.xlsx'):
-    # Create new volunteer entry
+def add_volunteer(aadhar_id, name, latitude, longitude, status='available', phone=None, address=None,
+                  vehicle_type=None, repo=None):
+    # Create new volunteer entry; without an ID the database assigns the next one
     new_volunteer = {
-        'Aadhar_ID': str(aadhar_id),
+        'ID': str(aadhar_id) if aadhar_id is not None else None,
         'Name': name,
+        'Phone': phone,
+        'Address': address,
         'Latitude': latitude,
         'Longitude': longitude,
+        'Vehicle Type': vehicle_type,
         'Status': status.lower()  # e.g., 'available' or 'busy'
     }
 
-    # If file exists, append to it
-    if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        df = pd.concat([df, pd.DataFrame([new_volunteer])], ignore_index=True)
-    else:
-        df = pd.DataFrame([new_volunteer])
-
-    # Save back to Excel
-    df.to_excel(file_path, index=False)
+    # Single-row insert into the database instead of rewriting the whole file
+    repo = repo or get_repository()
+    rowid = repo.add('volunteers', new_volunteer)
+    register("Volunteer", repo.position('volunteers', rowid), latitude, longitude)
     print(f"✅ Volunteer '{name}' added successfully.")
+    return rowid
+
 
 
 
+@timed("utils.build_weighted_graph")
+def build_weighted_graph(node_df, node_type="NGO", matrix=None):
+    """
+    Complete graph over one entity table, weighted by distance (km).
+    Nodes are the integer node IDs of model.Entities (distance matrix indices), so NGO and
+    destination graphs can be composed without clashing.
+    """
+    import networkx as nx
 
-def build_weighted_graph(node_df, node_type="NGO"):
-    coords = [(row['Latitude'], row['Longitude']) for idx, row in node_df.iterrows()]
+    start = time.perf_counter()
     G = nx.Graph()
 
-    for idx, (lat, lon) in enumerate(coords):
-        node_id = f"{node_type}_{idx}"
-        G.add_node(node_id, pos=(lat, lon), label=node_id)
-
-    for i in range(len(coords)):
-        for j in range(i + 1, len(coords)):
-            node_i = f"{node_type}_{i}"
-            node_j = f"{node_type}_{j}"
-            loc1, loc2 = coords[i], coords[j]
-            try:
-                dist = ox.distance.shortest_path_length(
-                    G=ox.graph_from_point(loc1, dist=10000, network_type='drive'),
-                    orig=ox.distance.nearest_nodes(G=ox.graph_from_point(loc1, dist=10000, network_type='drive'), X=loc1[1], Y=loc1[0]),
-                    dest=ox.distance.nearest_nodes(G=ox.graph_from_point(loc2, dist=10000, network_type='drive'), X=loc2[1], Y=loc2[0]),
-                    weight='length'
-                ) / 1000
-            except Exception:
-                dist = geodesic(loc1, loc2).km
-
-            G.add_edge(node_i, node_j, weight=dist)
+    # Edge weights come from one batched distance matrix instead of a search per pair
+    if matrix is None:
+        matrix = build_distance_matrix(node_df, None, use_roads=True)
+        kind = "NGO"
+    else:
+        kind = "NGO" if node_type == "NGO" else "Destination"
+    nodes = matrix.indices(kind)
+    km = matrix.block(kind, kind)
+
+    for pos, node in enumerate(nodes.tolist()):
+        G.add_node(node, pos=tuple(matrix.coords[node]), label=f"{node_type}_{pos}")
+    rows, cols = np.triu_indices(len(nodes), k=1)
+    G.add_weighted_edges_from(zip(nodes[rows].tolist(), nodes[cols].tolist(), km[rows, cols].tolist()))
 
+    print(f"⏱ {node_type} graph with {len(nodes)} nodes built in {time.perf_counter() - start:.2f}s")
     return G
 
 
 
 
 
-def assign_routes(ngo_df, dest_df, volunteer_df):
-    ngo_graph = build_weighted_graph(ngo_df, node_type="NGO")
-    dest_graph = build_weighted_graph(dest_df, node_type="Dest")
-    combined_graph = nx.compose(ngo_graph, dest_graph)
+# Shortest-path trees per graph, dropped together with the graph
+_path_trees = weakref.WeakKeyDictionary()
 
-    route_info = {}
 
-    for volunteer_idx, volunteer in volunteer_df.iterrows():
-        volunteer_pos = (volunteer['Latitude'], volunteer['Longitude'])
+def shortest_path_tree(G, source, weight='weight'):
+    """
+    Single-source Dijkstra tree, computed once per (graph, source) and reused afterwards.
+    Args:
+        G (nx.Graph): Graph to search; must not change while its trees are in use
+        source: Root node of the tree
+    Returns:
+        (pred, dist): predecessor lists and shortest distances of every reachable node
+    """
+    import networkx as nx
+
+    trees = _path_trees.setdefault(G, {})
+    if (source, weight) not in trees:
+        trees[(source, weight)] = nx.dijkstra_predecessor_and_distance(G, source, weight=weight)
+    return trees[(source, weight)]
 
-        closest_ngo = None
-        min_dist = float('inf')
-        closest_ngo_id = None
 
-        for idx in ngo_df.index:
-            ngo_pos = (ngo_df.loc[idx, 'Latitude'], ngo_df.loc[idx, 'Longitude'])
-            dist = geodesic(volunteer_pos, ngo_pos).km
-            if dist < min_dist:
-                closest_ngo = idx
-                closest_ngo_id = f"NGO_{idx}"
-                min_dist = dist
+def tree_path(pred, target):
+    # Walk the predecessors back from target to the root of the tree
+    path = [target]
+    while pred[path[-1]]:
+        path.append(pred[path[-1]][0])
+    path.reverse()
+    return path
 
-        volunteer_route = [closest_ngo_id]
 
-        for dest_idx in dest_df.index:
-            dest_id = f"Dest_{dest_idx}"
-            try:
-                shortest_path = nx.shortest_path(combined_graph, source=closest_ngo_id, target=dest_id, weight='weight')
-                volunteer_route.extend(shortest_path[1:])
-            except nx.NetworkXNoPath:
-                continue
+@timed("utils.assign_routes")
+def assign_routes(ngo_df, dest_df, volunteer_df, matrix=None):
+    import networkx as nx
+
+    if matrix is None:
+        matrix = build_distance_matrix(ngo_df, dest_df, volunteer_df, use_roads=True)
+    ngo_graph = build_weighted_graph(ngo_df, node_type="NGO", matrix=matrix)
+    dest_graph = build_weighted_graph(dest_df, node_type="Dest", matrix=matrix)
+    combined_graph = nx.compose(ngo_graph, dest_graph)
 
+    # Nearest NGO per volunteer from the haversine BallTree, all volunteers in one query
+    _, closest_labels = get_index("NGO", ngo_df).nearest(volunteer_df[['Latitude', 'Longitude']].to_numpy(dtype=float))
+    # The index returns row labels; the matrix is positional
+    closest_ngos = ngo_df.index.get_indexer(closest_labels)
+
+    # Volunteers anchored at the same NGO share one route, built from that NGO's path tree
+    ngo_routes = {}
+    for ngo_pos in set(closest_ngos.tolist()):
+        closest_ngo_id = matrix.index("NGO", ngo_pos)
+        pred, dist = shortest_path_tree(combined_graph, closest_ngo_id)
+
+        volunteer_route = [closest_ngo_id]
         total_distance = 0
-        for i in range(len(volunteer_route) - 1):
-            u = volunteer_route[i]
-            v = volunteer_route[i + 1]
-            total_distance += combined_graph[u][v]['weight']
+        for dest_id in matrix.indices("Destination").tolist():
+            if dest_id not in dist:
+                continue
+            volunteer_route.extend(tree_path(pred, dest_id)[1:])
+            total_distance += dist[dest_id]
+        ngo_routes[ngo_pos] = (volunteer_route, total_distance)
 
-        route_info[volunteer['ID']] = {
-            'Route': volunteer_route,
+    route_info = {}
+    for volunteer_id, ngo_pos in zip(volunteer_df['ID'], closest_ngos):
+        volunteer_route, total_distance = ngo_routes[ngo_pos]
+        route_info[volunteer_id] = {
+            'Route': list(volunteer_route),
             'Total Distance (km)': total_distance
         }
 
@@ -168,7 +186,7 @@ def display_routes(route_info, ngo_df, dest_df):
     """
     Display routes on a map using Streamlit.
     Args:
-        route_info (dict): Routes assigned to volunteers
+        route_info (dict): Routes assigned to volunteers (node IDs from assign_routes)
         ngo_df (pd.DataFrame): NGO DataFrame
         dest_df (pd.DataFrame): Destination DataFrame
     """
@@ -176,41 +194,24 @@ def display_routes(route_info, ngo_df, dest_df):
     import streamlit as st
     from streamlit_folium import folium_static
 
+    # Route nodes are node IDs of the NGOs followed by the destinations
+    entities = Entities.from_frames(ngo_df, dest_df)
+
     # Initialize the map at a central point
     m = folium.Map(location=[ngo_df['Latitude'].mean(), ngo_df['Longitude'].mean()], zoom_start=13)
 
-    # Add NGO markers
-    for idx, row in ngo_df.iterrows():
-        folium.Marker([row['Latitude'], row['Longitude']], popup=row['Name'], icon=folium.Icon(color='green')).add_to(m)
-
-    # Add Destination markers
-    for idx, row in dest_df.iterrows():
-        folium.Marker([row['Latitude'], row['Longitude']], popup=row['Name'], icon=folium.Icon(color='red')).add_to(m)
+    # Add NGO and Destination markers
+    for kind, color in (("NGO", "green"), ("Destination", "red")):
+        for node in entities.nodes(kind):
+            folium.Marker([entities.lat[node], entities.lon[node]], popup=entities.names[node],
+                          icon=folium.Icon(color=color)).add_to(m)
 
     # Add routes for volunteers
     for volunteer_id, info in route_info.items():
         route = info['Route']
-        for i in range(len(route) - 1):
-            u = route[i]
-            v = route[i + 1]
-
-            # Extract index and type for both nodes
-            if u.startswith("NGO_"):
-                u_idx = int(u.split("_")[1])
-                u_pos = (ngo_df.loc[u_idx, 'Latitude'], ngo_df.loc[u_idx, 'Longitude'])
-            elif u.startswith("Dest_"):
-                u_idx = int(u.split("_")[1])
-                u_pos = (dest_df.loc[u_idx, 'Latitude'], dest_df.loc[u_idx, 'Longitude'])
-
-            if v.startswith("NGO_"):
-                v_idx = int(v.split("_")[1])
-                v_pos = (ngo_df.loc[v_idx, 'Latitude'], ngo_df.loc[v_idx, 'Longitude'])
-            elif v.startswith("Dest_"):
-                v_idx = int(v.split("_")[1])
-                v_pos = (dest_df.loc[v_idx, 'Latitude'], dest_df.loc[v_idx, 'Longitude'])
-
-            folium.PolyLine([u_pos, v_pos], color='blue', weight=2.5, opacity=1).add_to(m)
+        if len(route) > 1:
+            folium.PolyLine(entities.coords(route).tolist(), color='blue', weight=2.5, opacity=1).add_to(m)
 
     # Display map
     st.write("### Volunteer Routes")
-    folium_static(m)
\ No newline at end of file
+    folium_static(m)